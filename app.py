@@ -1,47 +1,95 @@
 from flask import Flask, request, jsonify
-from google_sheets import get_lead_data, update_sheet, get_agency_info
-from openai_integration import generate_company_description, determine_and_generate_response, generate_cold_email_content, generate_proposal, validate_final_content
-from resend_integration import send_round_robin_email
-from utils import format_html_email, format_portfolio_html
-from portfolio_assets import PortfolioAssets  # Use this instead of drive_integration
+from google_sheets import get_lead_data, get_agency_info, PendingSheetWrites, warm_up
 from config import Config
+from disk_cache import DiskCache
 import logging
-from typing import Dict, Any, Tuple, List
+import re
+from typing import Dict, Any, Tuple, List, Optional
 from constants import SheetColumns, EmailStatus, SenderType
 from datetime import datetime
-import base64
-import os
-import openai
-from jinja2 import Environment, FileSystemLoader
+from concurrent.futures import ThreadPoolExecutor, as_completed, Future
+import threading
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
-jinja_env = Environment(loader=FileSystemLoader('templates'))
 
-def should_process_lead(lead: Dict[str, Any]) -> Tuple[bool, str]:
-    """Determine if a lead should be processed based on various conditions."""
+# Client messages asking for a proposal (matches "proposal", "proposals", ...)
+PROPOSAL_REQUEST_RE = re.compile(r'\bproposal', re.IGNORECASE)
+
+# Scraped/generated descriptions are stable per domain, so keep them across runs
+company_description_cache = DiskCache('company_descriptions', expire=86400 * 30)
+subject_line_cache = DiskCache('subject_lines', expire=86400 * 30)
+
+# Domain -> Future for a description being generated, so concurrent leads at one company share a scrape
+_descriptions_in_flight: Dict[str, Future] = {}
+_descriptions_in_flight_lock = threading.Lock()
+
+def get_company_description(domain: str) -> str:
+    """Return the company description for a domain, using the disk cache when possible"""
+    from openai_integration import generate_company_description
+
+    key = domain.lower().strip().removeprefix('www.')
+    description = company_description_cache.get(key)
+    if description:
+        return description
+
+    with _descriptions_in_flight_lock:
+        future = _descriptions_in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = _descriptions_in_flight[key] = Future()
+    if not owner:
+        return future.result()
+
+    try:
+        description = generate_company_description(domain)
+        # Don't persist the failure fallback so the domain is retried next run
+        if description and description != "Company description unavailable.":
+            company_description_cache.set(key, description)
+        future.set_result(description)
+        return description
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _descriptions_in_flight_lock:
+            del _descriptions_in_flight[key]
+
+_NEW = EmailStatus.NEW.value
+_SENT = EmailStatus.SENT.value
+_REPLIED = EmailStatus.REPLIED.value
+_FAILED = EmailStatus.FAILED.value
+
+# Email status -> (lead action, reason); statuses not listed need no action
+_STATUS_DISPATCH = {
+    None: ('new', "New lead needs cold email"),
+    '': ('new', "New lead needs cold email"),
+    _NEW: ('new', "New lead needs cold email"),
+    _REPLIED: ('reply', "Need to respond to client reply"),
+    _FAILED: ('retry', "Retrying failed email"),
+}
+
+def get_lead_action(lead: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """Return the action a lead needs ('new', 'reply', 'retry' or None) and the reason."""
     email_status = lead.get(SheetColumns.EMAIL_STATUS.value)
     last_message = lead.get(SheetColumns.LAST_MESSAGE.value)
     
     logging.info(f"Processing lead - Status: {email_status}, Last Message: {last_message}")
     
-    # Case 1: New lead that needs cold email
-    if not email_status or email_status == EmailStatus.NEW.value:
-        return True, "New lead needs cold email"
-    
-    # Case 2: Client replied to our email
-    if email_status == EmailStatus.REPLIED.value:
-        return True, "Need to respond to client reply"
-    
-    # Case 3: Cold email sent but no reply yet
-    if email_status == EmailStatus.SENT.value and not last_message:
-        return False, "Waiting for client response"
+    dispatch = _STATUS_DISPATCH.get(email_status)
+    if dispatch:
+        return dispatch
     
-    # Case 4: Failed email needs retry
-    if email_status == EmailStatus.FAILED.value:
-        return True, "Retrying failed email"
+    # Cold email sent but no reply yet
+    if email_status == _SENT and not last_message:
+        return None, "Waiting for client response"
         
-    return False, f"No action needed. Status: {email_status}"
+    return None, f"No action needed. Status: {email_status}"
+
+def should_process_lead(lead: Dict[str, Any]) -> Tuple[bool, str]:
+    """Determine if a lead should be processed based on various conditions."""
+    action, reason = get_lead_action(lead)
+    return action is not None, reason
 
 @app.route("/preview", methods=["GET"])
 def preview():
@@ -56,62 +104,40 @@ def preview():
 def send_emails():
     """Process leads and send emails where needed"""
     try:
-        leads = get_lead_data(Config.STARTING_ROW)
-        agency_info = get_agency_info()
-        processing_results = []
+        # The leads read and the agency profile (sheet read + OpenAI call) are independent; overlap them
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            agency_future = executor.submit(get_agency_info)
+            leads = get_lead_data(Config.STARTING_ROW)
+            agency_info = agency_future.result()
+        pending_writes = PendingSheetWrites()
+        outbox = []  # Cold emails generated by workers, sent in one batch afterwards
+        
+        # Each lead is dominated by OpenAI/Resend I/O, so process them concurrently
+        with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(process_lead_row, lead, index, agency_info, pending_writes, outbox)
+                for index, lead in enumerate(leads, start=Config.STARTING_ROW)
+            ]
+            processing_results = [future.result() for future in as_completed(futures)]
+        processing_results.sort(key=lambda r: r["row"])
+        
+        if outbox:
+            sent_results = send_queued_cold_emails(outbox, pending_writes)
+            processing_results = [sent_results.get(r["row"], r) for r in processing_results]
         
-        for index, lead in enumerate(leads, start=Config.STARTING_ROW):
-            try:
-                should_process, reason = should_process_lead(lead)
-                logging.info(f"Row {index}: Should process? {should_process} - {reason}")
-                
-                if not should_process:
-                    processing_results.append({
-                        "row": index,
-                        "action": "skipped",
-                        "reason": reason
-                    })
-                    continue
-                
-                result = None  # Initialize result
-                
-                # Case 1: Send cold email
-                if not lead.get(SheetColumns.EMAIL_STATUS.value) or lead.get(SheetColumns.EMAIL_STATUS.value) == EmailStatus.NEW.value:
-                    result = process_new_lead(lead, agency_info, index)
-                
-                # Case 2: Process client reply (both SENT with message and REPLIED status)
-                elif (lead.get(SheetColumns.EMAIL_STATUS.value) == EmailStatus.SENT.value and lead.get(SheetColumns.LAST_MESSAGE.value)) or \
-                     (lead.get(SheetColumns.EMAIL_STATUS.value) == EmailStatus.REPLIED.value):
-                    result = process_client_reply(lead, index, agency_info)
-                
-                # Case 3: Retry failed email
-                elif lead.get(SheetColumns.EMAIL_STATUS.value) == EmailStatus.FAILED.value:
-                    result = process_failed_email(lead, index)
-                
-                if result:  # Only append if we got a result
-                    processing_results.append({
-                        "row": index,
-                        "action": "processed",
-                        "result": result
-                    })
-                else:
-                    processing_results.append({
-                        "row": index,
-                        "action": "skipped",
-                        "reason": "No matching action found"
-                    })
-                
-            except Exception as e:
-                logging.error(f"Error processing row {index}: {str(e)}")
-                processing_results.append({
-                    "row": index,
-                    "action": "error",
-                    "error": str(e)
-                })
+        # Flush all row updates collected during the loop in one request
+        failed_rows = pending_writes.flush()
+        if failed_rows:
+            # Emails for these rows went out, but the sheet doesn't know; report them so they aren't re-sent blindly
+            logging.error(f"Sheet updates failed for rows {sorted(failed_rows)} after their emails were sent")
+            for result in processing_results:
+                if result["row"] in failed_rows:
+                    result["sheet_update"] = "failed"
         
         return jsonify({
-            "status": "success",
-            "results": processing_results
+            "status": "partial_success" if failed_rows else "success",
+            "results": processing_results,
+            "unsaved_rows": sorted(failed_rows)
         })
         
     except Exception as e:
@@ -120,126 +146,239 @@ def send_emails():
             "status": "error",
             "error": str(e)
         }), 500
-        
-def process_new_lead(lead: Dict[str, Any], agency_info: Dict, index: int) -> Dict[str, Any]:
-    """Handle sending cold email to new lead"""
-    try:
-        # Get company description with proper error handling
-        company_description = None
-        try:
-            company_description = generate_company_description(lead[SheetColumns.COMPANY_DOMAIN.value])
-            if company_description:
-                update_sheet(index, {
-                    SheetColumns.COMPANY_BACKGROUND: company_description
-                })
-        except Exception as e:
-            logging.warning(f"Could not generate company description: {str(e)}")
-            company_description = f"A technology company specializing in {lead.get(SheetColumns.HEADLINE.value, 'digital solutions')}"
 
-        # Generate email content first
-        email_content, portfolio_data = generate_cold_email_content(lead, agency_info, company_description)
-        if not email_content:
-            raise Exception("Failed to generate email content")
+def process_lead_row(lead: Dict[str, Any], index: int, agency_info: Dict, pending_writes: PendingSheetWrites, outbox: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Process a single lead row and return its result entry"""
+    try:
+        action, reason = get_lead_action(lead)
+        logging.info(f"Row {index}: Action: {action} - {reason}")
+        
+        if action is None:
+            return {
+                "row": index,
+                "action": "skipped",
+                "reason": reason
+            }
+        
+        result = LEAD_HANDLERS[action](lead, index, agency_info, pending_writes, outbox)
         
-        # Generate subject line separately
-        subject = generate_subject_line(lead, agency_info, email_content)
-        if not subject:
-            raise Exception("Failed to generate subject line")
-
-        # Add portfolio to agency info
-        complete_agency_info = {
-            **agency_info,
-            'portfolio': portfolio_data  # This will be used in email template
+        if result:  # Only append if we got a result
+            return {
+                "row": index,
+                "action": "processed",
+                "result": result
+            }
+        return {
+            "row": index,
+            "action": "skipped",
+            "reason": "No matching action found"
         }
+        
+    except Exception as e:
+        logging.error(f"Error processing row {index}: {str(e)}")
+        return {
+            "row": index,
+            "action": "error",
+            "error": str(e)
+        }
+        
+def with_portfolio(agency_info: Dict[str, Any], portfolio_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return agency info with the selected portfolio attached for the email template"""
+    return {**agency_info, 'portfolio': portfolio_data}
+
+def prepare_cold_email(lead: Dict[str, Any], agency_info: Dict, index: int, pending_writes: PendingSheetWrites) -> Dict[str, Any]:
+    """Generate the cold email for a new lead without sending it"""
+    # OpenAI, Drive and Jinja modules are only loaded once a lead needs them
+    from openai_integration import generate_cold_email_content, validate_final_content
+    from utils import format_html_email
+
+    # Get company description with proper error handling
+    company_description = None
+    try:
+        company_description = get_company_description(lead[SheetColumns.COMPANY_DOMAIN.value])
+        if company_description:
+            pending_writes.add(index, {
+                SheetColumns.COMPANY_BACKGROUND: company_description
+            })
+    except Exception as e:
+        logging.warning(f"Could not generate company description: {str(e)}")
+        company_description = f"A technology company specializing in {lead.get(SheetColumns.HEADLINE.value, 'digital solutions')}"
+
+    # Generate email content first
+    email_content, portfolio_data = generate_cold_email_content(lead, agency_info, company_description)
+    if not email_content:
+        raise Exception("Failed to generate email content")
+    
+    # Generate subject line separately
+    subject = generate_subject_line(lead, agency_info, email_content)
+    if not subject:
+        raise Exception("Failed to generate subject line")
 
-        # Validate final content
-        subject, email_content = validate_final_content(email_content, subject, lead, agency_info)
+    # Add portfolio to agency info
+    complete_agency_info = with_portfolio(agency_info, portfolio_data)
 
-        # Format email with portfolio
-        html_content = format_html_email(email_content, complete_agency_info)
+    # Validate final content
+    subject, email_content = validate_final_content(email_content, subject, lead, agency_info)
+
+    # Format email with portfolio
+    html_content = format_html_email(email_content, complete_agency_info)
+
+    return {
+        "row": index,
+        "lead": lead,
+        "agency_info": agency_info,
+        "to": lead[SheetColumns.EMAIL.value],
+        "subject": subject,
+        "email_content": email_content,
+        "html": html_content
+    }
+
+def record_cold_email(email: Dict[str, Any], email_status: Dict[str, Any], pending_writes: PendingSheetWrites) -> Dict[str, Any]:
+    """Queue the sheet update for a cold email once it has been sent"""
+    if email_status.get("status") != "success":
+        raise Exception(f"Email sending failed: {email_status.get('error')}")
+
+    lead = email["lead"]
+    # Update sheet with proper formatting
+    conversation_entry = (
+        f"Email Sent ({datetime.now().strftime('%Y-%m-%d %H:%M')})\n"
+        f"To: {lead[SheetColumns.NAME.value]} ({lead[SheetColumns.EMAIL.value]})\n"
+        f"From: {email['agency_info']['sender']['name']} ({email_status['details']['from']})\n"
+        f"\n{email['email_content']}"
+    )
+
+    pending_writes.add(email["row"], {
+        SheetColumns.COLD_EMAIL_SUBJECT: email["subject"],
+        SheetColumns.EMAIL_CONTENT: email["email_content"],
+        SheetColumns.HTML_EMAIL_CONTENT: email["html"],
+        SheetColumns.EMAIL_STATUS: EmailStatus.SENT,
+        SheetColumns.SENDER_EMAIL: email_status.get("details", {}).get("from"),
+        SheetColumns.LAST_SENDER: SenderType.AGENCY,
+        SheetColumns.CONVERSATION_HISTORY: conversation_entry
+    })
+    
+    return {"status": "success", "type": "cold_email"}
+
+def process_new_lead(lead: Dict[str, Any], agency_info: Dict, index: int, pending_writes: PendingSheetWrites = None) -> Dict[str, Any]:
+    """Handle sending cold email to new lead"""
+    from resend_integration import send_round_robin_email
+
+    # Without a shared writer, flush this lead's updates on return
+    flush_on_return = pending_writes is None
+    if flush_on_return:
+        pending_writes = PendingSheetWrites()
+    try:
+        email = prepare_cold_email(lead, agency_info, index, pending_writes)
         
         # Send email with proper subject
         email_status = send_round_robin_email(
-            lead[SheetColumns.EMAIL.value], 
-            subject,  # Use the generated subject directly
-            html_content
+            email["to"], 
+            email["subject"],  # Use the generated subject directly
+            email["html"]
         )
-        # Update sheet with proper formatting
-        conversation_entry = (
-            f"Email Sent ({datetime.now().strftime('%Y-%m-%d %H:%M')})\n"
-            f"To: {lead[SheetColumns.NAME.value]} ({lead[SheetColumns.EMAIL.value]})\n"
-            f"From: {agency_info['sender']['name']} ({email_status['details']['from']})\n"
-            f"\n{email_content}"
-        )
-
-        update_sheet(index, {
-            SheetColumns.COLD_EMAIL_SUBJECT: subject,
-            SheetColumns.EMAIL_CONTENT: email_content,
-            SheetColumns.HTML_EMAIL_CONTENT: html_content,
-            SheetColumns.EMAIL_STATUS: EmailStatus.SENT,
-            SheetColumns.SENDER_EMAIL: email_status.get("details", {}).get("from"),
-            SheetColumns.LAST_SENDER: SenderType.AGENCY,
-            SheetColumns.CONVERSATION_HISTORY: conversation_entry
-        })
-        
-        return {"status": "success", "type": "cold_email"}
+        return record_cold_email(email, email_status, pending_writes)
         
     except Exception as e:
         logging.error(f"Error in process_new_lead: {str(e)}")
         raise
+    finally:
+        if flush_on_return and pending_writes.flush():
+            logging.error(f"Sheet update failed for row {index}")
+
+def queue_new_lead(lead: Dict[str, Any], agency_info: Dict, index: int, pending_writes: PendingSheetWrites, outbox: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Generate a cold email and queue it for the batched send at the end of send_emails"""
+    try:
+        outbox.append(prepare_cold_email(lead, agency_info, index, pending_writes))
+        return {"status": "queued", "type": "cold_email"}
+    except Exception as e:
+        logging.error(f"Error in queue_new_lead: {str(e)}")
+        raise
 
-def process_client_reply(lead: Dict[str, Any], index: int, agency_info: Dict[str, Any]) -> Dict[str, Any]:
+def send_queued_cold_emails(outbox: List[Dict[str, Any]], pending_writes: PendingSheetWrites) -> Dict[int, Dict[str, Any]]:
+    """Send queued cold emails through Resend's batch endpoint and return result entries by row"""
+    from resend_integration import send_round_robin_email_batch
+
+    email_statuses = send_round_robin_email_batch(outbox)
+    results = {}
+    for email, email_status in zip(outbox, email_statuses):
+        row = email["row"]
+        try:
+            results[row] = {
+                "row": row,
+                "action": "processed",
+                "result": record_cold_email(email, email_status, pending_writes)
+            }
+        except Exception as e:
+            logging.error(f"Error sending cold email for row {row}: {str(e)}")
+            results[row] = {
+                "row": row,
+                "action": "error",
+                "error": str(e)
+            }
+    return results
+
+def process_client_reply(lead: Dict[str, Any], index: int, agency_info: Dict[str, Any], pending_writes: PendingSheetWrites = None) -> Dict[str, Any]:
     
     """Handle generating and sending response to client reply"""
+    from openai_integration import determine_and_generate_response, generate_proposal
+    from resend_integration import send_round_robin_email
+    from utils import format_html_email
+
+    # Without a shared writer, flush this lead's updates on return
+    flush_on_return = pending_writes is None
+    if flush_on_return:
+        pending_writes = PendingSheetWrites()
     try:
         logging.info(f"Processing client reply for row {index}")
         
-        previous_conversation = lead.get(SheetColumns.CONVERSATION_HISTORY.value, "")
+        previous_conversation = lead.get(SheetColumns.CONVERSATION_HISTORY.value) or ""
         # Get original subject or create new one
         original_subject = lead.get(SheetColumns.COLD_EMAIL_SUBJECT.value, "Your inquiry")
         subject = f"Re: {original_subject}" if not original_subject.lower().startswith('re:') else original_subject
         
-        # Generate response
-        response_email, portfolio_data = determine_and_generate_response(
-            {
-                **lead,
-                'name': lead.get(SheetColumns.NAME.value, '').split()[0]
-            }, 
-            previous_conversation, 
-            agency_info
-        )
-        # Add portfolio to agency info for template
-        complete_agency_info = {
-            **agency_info,
-            'portfolio': portfolio_data
-        }
+        # The proposal doesn't depend on the reply, so generate both concurrently
+        needs_proposal = bool(PROPOSAL_REQUEST_RE.search(lead.get(SheetColumns.LAST_MESSAGE.value) or ""))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            proposal_future = None
+            if needs_proposal:
+                proposal_future = executor.submit(generate_proposal, lead, previous_conversation, agency_info)
+
+            # Generate response
+            response_email, portfolio_data = determine_and_generate_response(
+                {
+                    **lead,
+                    'name': lead.get(SheetColumns.NAME.value, '').split()[0]
+                }, 
+                previous_conversation, 
+                agency_info
+            )
+            # Add portfolio to agency info for template
+            complete_agency_info = with_portfolio(agency_info, portfolio_data)
+            
+            html_content = format_html_email(response_email, complete_agency_info)
+            sheet_updates = {}
+
+            if proposal_future:
+                markdown_proposal, pdf_proposal = proposal_future.result()
         
         # Check if proposal is needed
-        if "proposal" in lead.get(SheetColumns.LAST_MESSAGE.value, "").lower():
-            markdown_proposal, pdf_proposal = generate_proposal(lead, previous_conversation, agency_info)
-            
-            # Save markdown version to sheet
-            update_sheet(index, {
-                SheetColumns.PROPOSAL.value: markdown_proposal
-            })
+        if needs_proposal:
             
-            # Encode PDF for attachment
-            pdf_base64 = base64.b64encode(pdf_proposal).decode()
+            # Save markdown version to sheet along with the final update, once the email is sent
+            sheet_updates[SheetColumns.PROPOSAL.value] = markdown_proposal
             
-            # Send email with attachment
-            html_content = format_html_email(response_email)
+            # Send email with attachment (raw PDF bytes are encoded by the sender)
             email_status = send_round_robin_email(
                 lead[SheetColumns.EMAIL.value], 
                 subject,
                 html_content,
                 attachments=[{
-                    'content': pdf_base64,
+                    'content': pdf_proposal,
                     'filename': f"{lead.get(SheetColumns.COMPANY_NAME.value, 'Proposal')}.pdf"
                 }]
             )
         else:
-            # Format and send email without attachment
-            html_content = format_html_email(response_email)
+            # Send email without attachment
             email_status = send_round_robin_email(
                 lead[SheetColumns.EMAIL.value], 
                 subject,
@@ -249,32 +388,46 @@ def process_client_reply(lead: Dict[str, Any], index: int, agency_info: Dict[str
         if email_status.get("status") != "success":
             raise Exception(f"Email sending failed: {email_status.get('error')}")
 
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
+
         # Update sheet
-        update_sheet(index, {
+        pending_writes.add(index, {
+            **sheet_updates,
             SheetColumns.RESPONSE.value: response_email,
             SheetColumns.EMAIL_STATUS.value: EmailStatus.ACTIVE.value,
             SheetColumns.SENDER_EMAIL.value: email_status.get("details", {}).get("from", "Unknown sender"),
             SheetColumns.LAST_SENDER.value: SenderType.AGENCY.value,
-            SheetColumns.CONVERSATION_HISTORY.value: (
-                f"{previous_conversation}\n\n"
-                f"Client ({datetime.now()}):\n{lead.get(SheetColumns.LAST_MESSAGE.value)}\n\n"
-                f"Our Response ({datetime.now()}):\n{response_email}"
-            )
+            SheetColumns.CONVERSATION_HISTORY.value: "\n\n".join(filter(None, [
+                previous_conversation,
+                f"Client ({timestamp}):\n{lead.get(SheetColumns.LAST_MESSAGE.value)}",
+                f"Our Response ({timestamp}):\n{response_email}"
+            ]))
         })
 
         return {"status": "run_success", "type": "response"}
     except Exception as e:
         logging.error(f"Error in process_client_reply: {str(e)}")
         raise
+    finally:
+        if flush_on_return and pending_writes.flush():
+            logging.error(f"Sheet update failed for row {index}")
 
 def process_failed_email(lead: Dict[str, Any], index: int) -> Dict[str, Any]:
     """Handle retrying failed emails"""
     # Implement retry logic here
     pass
 
+# Lead action -> handler, called as handler(lead, index, agency_info, pending_writes, outbox)
+LEAD_HANDLERS = {
+    'new': lambda lead, index, agency_info, pending_writes, outbox: queue_new_lead(lead, agency_info, index, pending_writes, outbox),
+    'reply': lambda lead, index, agency_info, pending_writes, outbox: process_client_reply(lead, index, agency_info, pending_writes),
+    'retry': lambda lead, index, agency_info, pending_writes, outbox: process_failed_email(lead, index),
+}
+
 @app.route("/monitor_emails", methods=["POST"])
 def monitor_emails_endpoint():
     """Endpoint to check for email replies and update Google Sheets"""
+    monitor = None
     try:
         logging.info("Starting email monitoring process...")
         from email_monitor import EmailMonitor
@@ -294,30 +447,58 @@ def monitor_emails_endpoint():
             "status": "error",
             "error": str(e)
         }), 500
+    finally:
+        if monitor is not None:
+            monitor.close()
+
+SUBJECT_LINE_INSTRUCTIONS = """
+Generate a compelling email subject line for the context provided by the user.
+
+Requirements:
+- Mention value proposition
+- Keep under 60 characters
+- No generic templates
+"""
 
 def generate_subject_line(lead: Dict[str, Any], agency_info: Dict, email_body) -> str:
+    from openai_client import get_openai_client
+
+    # The first subject generated for a company/headline/agency is reused as canonical
+    cache_key = '|'.join([
+        lead.get(SheetColumns.COMPANY_NAME.value) or '',
+        lead.get(SheetColumns.HEADLINE.value) or '',
+        agency_info.get('name') or ''
+    ])
+    subject = subject_line_cache.get(cache_key)
+    if subject:
+        return subject
+
+    # Static instructions go first so OpenAI's automatic prompt-prefix caching can reuse them
     prompt = f"""
-    Generate a compelling email subject line for this context:
-    
     Company: {lead.get(SheetColumns.COMPANY_NAME.value)}
     Their Focus: {lead.get(SheetColumns.HEADLINE.value)}
     Our Company: {agency_info['name']}
     Email Body: {email_body}
-    
-    Requirements:
-    - Mention value proposition
-    - Keep under 60 characters
-    - No generic templates
     """
     
-    response = openai.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
+    # A sub-60-character subject doesn't need a large model; cap output at one short line
+    response = get_openai_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": SUBJECT_LINE_INSTRUCTIONS},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.4,
+        max_tokens=20,
+        stop=["\n"]
     )
     
-    return response.choices[0].message.content.strip()
+    subject = response.choices[0].message.content.strip()
+    if subject:
+        subject_line_cache.set(cache_key, subject)
+    return subject
 
 if __name__ == "__main__":
     Config.validate_config()
+    warm_up()
     app.run(debug=True)
@@ -19,6 +19,8 @@ class Config:
     CALENDAR_LINK = os.getenv("CALENDAR_LINK")
     STARTING_ROW = int(os.getenv("STARTING_ROW"))
     ENDING_ROW = int(os.getenv("ENDING_ROW", 0))  # 0 means process till the end
+    MAX_WORKERS = int(os.getenv("MAX_WORKERS", 8))  # Leads processed concurrently; keep within OpenAI/Resend rate limits
+    TWO_STEP_REPLIES = os.getenv("TWO_STEP_REPLIES", "false").lower() == "true"  # Separate analysis + writing calls, for debugging reply quality
     
     # Sender configurations with consistent domain ordering
     SENDER_CONFIGS = [
@@ -23,29 +23,31 @@ class SheetColumns(str, Enum):
     HTML_EMAIL_CONTENT = 'HTML_EMAIL_CONTENT'
 
     @classmethod
-    def required_columns(cls) -> list[str]:
-        """List of columns that must exist in the sheet"""
-        return [
-            cls.NAME.value,
-            cls.EMAIL.value,
-            cls.COMPANY_NAME.value,
-            cls.COMPANY_DOMAIN.value,
-            cls.EMAIL_STATUS.value,
-            cls.SENDER_EMAIL.value
-        ]
+    def required_columns(cls) -> tuple[str, ...]:
+        """Columns that must exist in the sheet"""
+        return _REQUIRED_COLUMNS
     
     @classmethod
-    def optional_columns(cls) -> list[str]:
-        """List of columns that are optional"""
-        return [col.value for col in cls if col.value not in cls.required_columns()]
+    def optional_columns(cls) -> tuple[str, ...]:
+        """Columns that are optional"""
+        return _OPTIONAL_COLUMNS
 
     @classmethod
     def get_value(cls, field: str) -> str:
         """Get enum value with case-insensitive matching"""
-        for member in cls:
-            if member.value.lower() == field.lower():
-                return member.value
-        return field
+        return _COLUMNS_BY_LOWER_NAME.get(field.lower(), field)
+
+# Column lookups are fixed once the enum is defined, so compute them a single time
+_REQUIRED_COLUMNS = (
+    SheetColumns.NAME.value,
+    SheetColumns.EMAIL.value,
+    SheetColumns.COMPANY_NAME.value,
+    SheetColumns.COMPANY_DOMAIN.value,
+    SheetColumns.EMAIL_STATUS.value,
+    SheetColumns.SENDER_EMAIL.value
+)
+_OPTIONAL_COLUMNS = tuple(col.value for col in SheetColumns if col.value not in _REQUIRED_COLUMNS)
+_COLUMNS_BY_LOWER_NAME = {col.value.lower(): col.value for col in SheetColumns}
 
 class EmailStatus(str, Enum):
     NEW = "New"  # Initial state when lead is first added to the system
@@ -0,0 +1,40 @@
+import os
+import shelve
+import threading
+import time
+import logging
+from typing import Any, Optional
+
+CACHE_DIR = '.cache'
+
+class DiskCache:
+    """Small persistent key/value cache with per-entry expiry, backed by shelve"""
+
+    def __init__(self, name: str, expire: Optional[float] = None):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.path = os.path.join(CACHE_DIR, name)
+        self.expire = expire  # Seconds; None means entries never expire
+        self._lock = threading.Lock()  # shelve does not support concurrent access
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            with self._lock, shelve.open(self.path) as db:
+                entry = db.get(key)
+        except Exception as e:
+            logging.warning(f"Cache read failed for {self.path}: {e}")
+            return default
+
+        if entry is None:
+            return default
+
+        stored_at, value = entry
+        if self.expire is not None and time.time() - stored_at > self.expire:
+            return default
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            with self._lock, shelve.open(self.path) as db:
+                db[key] = (time.time(), value)
+        except Exception as e:
+            logging.warning(f"Cache write failed for {self.path}: {e}")
@@ -5,42 +5,58 @@ from googleapiclient.discovery import build
 import os.path
 import pickle
 import re
+from collections import defaultdict
+from functools import lru_cache
 
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
+@lru_cache(maxsize=1)
+def get_drive_service():
+    """Build the Drive service once and share it between DriveAssets and PortfolioAssets"""
+    creds = None
+    if os.path.exists('token.pickle'):
+        with open('token.pickle', 'rb') as token:
+            creds = pickle.load(token)
+            
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            flow = InstalledAppFlow.from_client_secrets_file(
+                'credentials.json', SCOPES)
+            creds = flow.run_local_server(port=0)
+        with open('token.pickle', 'wb') as token:
+            pickle.dump(creds, token)
+
+    # Skip the discovery file cache; it is unavailable with oauth2client>=4 and only logs warnings
+    return build('drive', 'v3', credentials=creds, cache_discovery=False)
+
+def list_folder_files(service, folder_id: str, file_fields: str):
+    """Yield every file in a Drive folder, following pagination with a minimal fields mask"""
+    page_token = None
+    while True:
+        results = service.files().list(
+            q=f"'{folder_id}' in parents",
+            fields=f"nextPageToken,files({file_fields})",
+            pageSize=1000,
+            pageToken=page_token
+        ).execute()
+        yield from results.get('files', [])
+
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+
 class DriveAssets:
     def __init__(self, assets_folder_id: str):
         self.folder_id = assets_folder_id
-        self.service = self._get_drive_service()
+        self.service = get_drive_service()
         self.assets_cache = {}
 
-    def _get_drive_service(self):
-        creds = None
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                creds = pickle.load(token)
-                
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                creds = flow.run_local_server(port=0)
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
-
-        return build('drive', 'v3', credentials=creds)
-
     def get_assets_list(self):
         """Get all assets from the specified folder"""
-        results = self.service.files().list(
-            q=f"'{self.folder_id}' in parents",
-            fields="files(id, name, webViewLink, mimeType)"
-        ).execute()
-        
         assets = {}
-        for file in results.get('files', []):
+        for file in list_folder_files(self.service, self.folder_id, "id,name,webViewLink,mimeType"):
             category = file['name'].split('_')[0].lower()
             if category not in assets:
                 assets[category] = []
@@ -60,38 +76,42 @@ class DriveAssets:
             self.get_assets_list()
         return self.assets_cache.get(category, []) 
 
+# File extension -> asset category, checked after the 'presentation' name match
+ASSET_CATEGORY_BY_EXTENSION = {
+    '.pdf': 'presentations',
+    '.mp4': 'videos',
+    '.mov': 'videos',
+}
+
+# Name substring -> asset category, checked in order when the extension doesn't decide
+ASSET_CATEGORY_BY_NAME = (
+    ('landing page', 'landing_pages'),
+    ('case study', 'case_studies'),
+)
+
+def _categorize_asset(lower_name: str) -> str:
+    """Map a lowercased file name to its portfolio asset category"""
+    if 'presentation' in lower_name:
+        return 'presentations'
+
+    category = ASSET_CATEGORY_BY_EXTENSION.get(os.path.splitext(lower_name)[1])
+    if category:
+        return category
+
+    for marker, category in ASSET_CATEGORY_BY_NAME:
+        if marker in lower_name:
+            return category
+    return 'other'
+
 class PortfolioAssets:
     def __init__(self, folder_id: str = "1Xd7pEbuz2qKwGZcSaS1awxs-RDO3XpDU"):
         self.folder_id = folder_id
-        self.service = self._get_drive_service()
+        self.service = get_drive_service()
         self.assets_cache = {}
         self._initialize_assets()
 
-    def _get_drive_service(self):
-        creds = None
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                creds = pickle.load(token)
-        
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', ['https://www.googleapis.com/auth/drive.readonly'])
-                creds = flow.run_local_server(port=0)
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
-
-        return build('drive', 'v3', credentials=creds)
-
     def _initialize_assets(self):
         """Fetch and categorize all portfolio assets"""
-        results = self.service.files().list(
-            q=f"'{self.folder_id}' in parents",
-            fields="files(id, name, mimeType, webViewLink)"
-        ).execute()
-
         self.assets_cache = {
             'presentations': [],
             'videos': [],
@@ -100,25 +120,34 @@ class PortfolioAssets:
             'other': []
         }
 
-        for file in results.get('files', []):
+        for file in list_folder_files(self.service, self.folder_id, "id,name,mimeType,webViewLink"):
+            name = file['name']
+            lower_name = name.lower()
             asset = {
                 'id': file['id'],
-                'name': self._clean_filename(file['name']),
+                'name': self._clean_filename(name),
                 'url': file['webViewLink'],
                 'type': file['mimeType'],
-                'project': self._extract_project_name(file['name'])
+                'project': self._extract_project_name(name)
             }
 
-            if 'presentation' in file['name'].lower() or file['name'].endswith('.pdf'):
-                self.assets_cache['presentations'].append(asset)
-            elif file['name'].endswith(('.mp4', '.MP4', '.mov')):
-                self.assets_cache['videos'].append(asset)
-            elif 'landing page' in file['name'].lower():
-                self.assets_cache['landing_pages'].append(asset)
-            elif 'case study' in file['name'].lower():
-                self.assets_cache['case_studies'].append(asset)
-            else:
-                self.assets_cache['other'].append(asset)
+            self.assets_cache[_categorize_asset(lower_name)].append(asset)
+
+        self._build_keyword_index()
+
+    def _build_keyword_index(self):
+        """Flatten cached assets into parallel lists and a token -> asset index map"""
+        self._flat_assets = []
+        self._asset_categories = []
+        self._keyword_index = defaultdict(set)
+
+        for category, assets in self.assets_cache.items():
+            for asset in assets:
+                asset_idx = len(self._flat_assets)
+                self._flat_assets.append(asset)
+                self._asset_categories.append(category)
+                for token in re.findall(r'\w+', asset['name'].lower()):
+                    self._keyword_index[token].add(asset_idx)
 
     def _clean_filename(self, filename: str) -> str:
         """Remove file extension and clean up filename"""
@@ -137,14 +166,20 @@ class PortfolioAssets:
             'landing_pages': []
         }
 
-        # Match project type with relevant assets
-        keywords = project_type.lower().split()
-        
-        for category in self.assets_cache:
-            for asset in self.assets_cache[category]:
-                if any(keyword in asset['name'].lower() for keyword in keywords):
-                    if len(relevant_assets[category]) < count:
-                        relevant_assets[category].append(asset)
+        # Match project type tokens against the precomputed keyword index
+        keywords = re.findall(r'\w+', project_type.lower())
+        matches = set().union(*(self._keyword_index.get(keyword, ()) for keyword in keywords))
+
+        # Keep original category/file ordering by walking matches in index order
+        remaining = len(relevant_assets) * count
+        for asset_idx in sorted(matches):
+            bucket = relevant_assets.get(self._asset_categories[asset_idx])
+            if bucket is None or len(bucket) >= count:
+                continue
+            bucket.append(self._flat_assets[asset_idx])
+            remaining -= 1
+            if not remaining:
+                break
 
         return relevant_assets
 
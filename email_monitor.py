@@ -1,17 +1,109 @@
 import imaplib
 import email
 from email.header import decode_header
+from email.utils import getaddresses
+from email.parser import BytesParser
+from email import policy
 import logging
 from config import Config
-from google_sheets import update_sheet, get_lead_data
+from google_sheets import get_lead_data, invalidate_lead_data_cache, PendingSheetWrites
 import time
+import threading
+import socket
+import itertools
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 from constants import SheetColumns, EmailStatus, SenderType
-from bs4 import BeautifulSoup
 import html2text
+import re
 
 logging.basicConfig(level=logging.INFO)
 
+# Seconds between checks when polling instead of using IDLE
+POLL_INTERVAL = 600
+
+# How many processed reply Message-IDs to remember, oldest forgotten first
+SEEN_MESSAGE_LIMIT = 10_000
+
+# Servers may end IDLE after 30 minutes of silence, so re-issue it before then
+IDLE_TIMEOUT = 29 * 60
+
+# Tags for IDLE commands we issue ourselves; distinct from imaplib's own tag prefix
+IDLE_TAGS = itertools.count(1)
+
+# Headers needed to match leads and rebuild threads; fetched with PEEK so messages stay unread
+HEADER_FETCH = '(BODY.PEEK[HEADER.FIELDS (FROM TO CC DATE MESSAGE-ID IN-REPLY-TO REFERENCES THREAD-INDEX)])'
+FULL_MESSAGE_FETCH = '(BODY.PEEK[])'
+FETCH_CHUNK_SIZE = 500  # Messages per FETCH command, keeps command lines a sane length
+
+# Modern email API parser; header-only fetches are parsed with headersonly=True
+MESSAGE_PARSER = BytesParser(policy=policy.default)
+
+# Above this many leads the OR FROM chain gets too long for some servers, so search ALL instead
+MAX_SEARCH_LEADS = 200
+
+# <script>/<style> blocks carry no reply text; drop them before html2text sees the markup
+SCRIPT_STYLE_RE = re.compile(r'<(script|style)[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+
+# Only the <body> subtree holds reply text; <head> metadata and styles are dropped before conversion
+BODY_RE = re.compile(r'<body[^>]*>(.*)</body>', re.IGNORECASE | re.DOTALL)
+
+# Tags left in short bodies that skip html2text, e.g. <div dir="ltr">Yes</div> from HTML-only replies
+_TAG_RE = re.compile(r'</?[A-Za-z][^<>]*>')
+
+# Bodies with fewer angle brackets than this are treated as plain text and skip html2text
+MIN_HTML_TAG_MARKERS = 5
+
+# html2text settings for reply bodies, defined once and applied to each converter
+HTML2TEXT_OPTIONS = {
+    'ignore_links': False,
+    'body_width': 0,  # Don't wrap text
+    'protect_links': True,  # Keep the full URLs
+}
+
+def build_from_search(emails) -> str:
+    """Build an IMAP SEARCH matching mail from any of the given addresses (OR is binary, so fold left)"""
+    addresses = [e for e in emails if e]
+    if not addresses or len(addresses) > MAX_SEARCH_LEADS:
+        return 'ALL'
+    # Addresses that can't be sent as a plain quoted string would need literals; search everything instead
+    if any(not e.isascii() or any(c in e for c in '"\\ ') for e in addresses):
+        return 'ALL'
+
+    criteria = f'FROM "{addresses[0]}"'
+    for address in addresses[1:]:
+        criteria = f'OR {criteria} FROM "{address}"'
+    return criteria
+
+THREAD_TOKEN_RE = re.compile(rb'[()]|\d+')
+
+def parse_thread_response(data: bytes) -> dict:
+    """Map each message number in an IMAP THREAD response to every number in its thread"""
+    threads = {}
+    depth = 0
+    members = []
+    for token in THREAD_TOKEN_RE.findall(data):
+        if token == b'(':
+            if depth == 0:
+                members = []  # Each top-level group is one thread
+            depth += 1
+        elif token == b')':
+            depth -= 1
+            if depth == 0:
+                for num in members:
+                    threads[num] = members
+        else:
+            members.append(token)
+    return threads
+
+def make_html2text() -> html2text.HTML2Text:
+    """Return a configured converter; instances keep their output buffer, so use one per document"""
+    converter = html2text.HTML2Text()
+    for option, value in HTML2TEXT_OPTIONS.items():
+        setattr(converter, option, value)
+    return converter
+
 class EmailMonitor:
     def __init__(self):
         self.email_configs = [
@@ -23,29 +115,212 @@ class EmailMonitor:
             }
             for config in Config.SENDER_CONFIGS
         ]
+        # Logged-in IMAP connections kept across check cycles, keyed by account email
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+        self._lead_update_lock = threading.Lock()
+        # Replies already written to the sheet, as (Message-ID, lead email) pairs
+        self._seen_replies = set()
+        self._seen_order = deque()
+        self._seen_lock = threading.Lock()
 
     def check_replies(self):
-        for config in self.email_configs:
+        # Read the leads sheet fresh once per cycle and share the lookup between inboxes
+        invalidate_lead_data_cache()
+        pending_writes = PendingSheetWrites()
+        queued_replies = []  # (reply key, sheet row) pairs, marked seen once their row is saved
+        # Each account is independent, network-bound work, so check them all at once
+        with ThreadPoolExecutor(max_workers=len(self.email_configs) + 1) as executor:
+            # Prefetch the leads in the background; inbox workers log in while the sheet read is in flight
+            lead_index_future = executor.submit(self._build_lead_index)
+            futures = {
+                executor.submit(self._check_single_inbox, config, lead_index_future, pending_writes, queued_replies): config
+                for config in self.email_configs
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error checking {futures[future]['email']}: {e}")
+        # Write every reply found this cycle in one batch
+        self._flush_replies(pending_writes, queued_replies)
+
+    def _flush_replies(self, pending_writes, queued_replies):
+        """Write queued replies, then mark seen only those whose sheet row was saved"""
+        failed_rows = pending_writes.flush()
+        # A reply queued more than once stays unseen if any of its rows failed
+        failed_keys = {reply_key for reply_key, row_index in queued_replies if row_index in failed_rows}
+        for reply_key, row_index in queued_replies:
+            if reply_key in failed_keys:
+                logging.warning(f"Reply {reply_key[0]} for row {row_index} was not saved; will retry next cycle")
+                continue
+            self._mark_seen(reply_key)
+
+    def watch_inbox(self, config):
+        """Check one inbox whenever the server reports new mail, using IMAP IDLE instead of polling"""
+        if not self._supports_idle(config):
+            logging.warning(f"{config['email']} does not support IDLE, polling instead")
+            while True:
+                # Reuses the pooled connection, so polling doesn't log in every cycle
+                self._check_single_inbox(config)
+                time.sleep(POLL_INTERVAL)
+
+        while True:
             try:
+                # Catch up on anything that arrived while we weren't listening
                 self._check_single_inbox(config)
+
+                mail = self._connect(config)
+                try:
+                    while True:
+                        if self._wait_for_new_mail(mail, IDLE_TIMEOUT):
+                            logging.info(f"New mail reported for {config['email']}")
+                            self._check_single_inbox(config)
+                        else:
+                            mail.noop()  # Keep the connection alive between IDLE sessions
+                finally:
+                    try:
+                        mail.logout()
+                    except Exception:
+                        pass
+
+            except Exception as e:
+                logging.error(f"Error watching {config['email']}: {e}")
+                time.sleep(60)  # Wait a minute before reconnecting
+
+    def _supports_idle(self, config) -> bool:
+        """Check the account's IDLE capability once, retrying until the server is reachable"""
+        while True:
+            try:
+                return 'IDLE' in self._get_connection(config).session_capabilities
             except Exception as e:
-                logging.error(f"Error checking {config['email']}: {e}")
+                logging.error(f"Error connecting to {config['email']}: {e}")
+                self._drop_connection(config)
+                time.sleep(60)
+
+    def _connect(self, config):
+        logging.info(f"Connecting to {config['email']}...")
+        mail = imaplib.IMAP4_SSL(config['imap_server'], config['imap_port'])
+        mail.login(config['email'], config['password'])
+        mail.select('INBOX')
+        # imaplib only keeps the pre-login CAPABILITY list; many servers advertise more once authenticated
+        _, data = mail.capability()
+        mail.session_capabilities = frozenset(
+            name.upper() for line in data if line for name in line.decode('ascii', 'replace').split()
+        )
+        return mail
+
+    def _wait_for_new_mail(self, mail, timeout: float) -> bool:
+        """Hold an IMAP IDLE session until the server reports new messages or the timeout expires"""
+        tag = b'IDLE%d' % next(IDLE_TAGS)
+        mail.send(tag + b' IDLE\r\n')
+        response = mail.readline()
+        if not response.startswith(b'+'):
+            raise imaplib.IMAP4.error(f"IDLE rejected: {response!r}")
 
-    def _check_single_inbox(self, config):
+        new_mail = False
+        deadline = time.monotonic() + timeout
+        previous_timeout = mail.sock.gettimeout()
         try:
-            logging.info(f"Connecting to {config['email']}...")
-            mail = imaplib.IMAP4_SSL(config['imap_server'], config['imap_port'])
-            mail.login(config['email'], config['password'])
-            mail.select('INBOX')
+            while not new_mail:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # Read through imaplib's buffered file, so responses already decoded from the
+                # TLS stream (e.g. in the same record as the continuation) are seen immediately
+                mail.sock.settimeout(remaining)
+                try:
+                    line = mail.readline()
+                except socket.timeout:  # Alias of TimeoutError on 3.10+, a distinct OSError subclass on 3.9
+                    # A timed-out socket file refuses further reads; nothing was buffered, so replace it
+                    mail.file.close()
+                    mail.file = mail.sock.makefile('rb')
+                    break
+                if not line:
+                    raise imaplib.IMAP4.abort("Connection closed during IDLE")
+                new_mail = b' EXISTS' in line
+        finally:
+            mail.sock.settimeout(previous_timeout)
+            # End IDLE and consume responses up to its tagged completion
+            mail.send(b'DONE\r\n')
+            while True:
+                line = mail.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("Connection closed while ending IDLE")
+                if line.startswith(tag):
+                    break
+
+        return new_mail
+
+    def _get_connection(self, config):
+        """Return the pooled connection for an account, reconnecting if it has gone stale"""
+        with self._connections_lock:
+            mail = self._connections.pop(config['email'], None)
+
+        if mail is not None:
+            try:
+                mail.noop()  # Cheap liveness check that also keeps the session from idling out
+            except (imaplib.IMAP4.error, OSError):
+                logging.info(f"Pooled connection for {config['email']} is stale, reconnecting")
+                mail = None
+
+        if mail is None:
+            mail = self._connect(config)
+
+        with self._connections_lock:
+            self._connections[config['email']] = mail
+        return mail
+
+    def _drop_connection(self, config):
+        with self._connections_lock:
+            mail = self._connections.pop(config['email'], None)
+        if mail is not None:
+            try:
+                mail.logout()
+            except Exception:
+                pass
+
+    def close(self):
+        """Log out every pooled connection"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, {}
+        for mail in connections.values():
+            try:
+                mail.logout()
+            except Exception:
+                pass
+
+    def _build_lead_index(self):
+        """Map each normalized lead email to its (sheet row, lead) pair"""
+        leads = get_lead_data(Config.STARTING_ROW)
+        lead_index_map = {}
+        for index, lead in enumerate(leads, start=Config.STARTING_ROW):
+            # Empty cells come back as None; normalize once so lookups are plain dict hits
+            lead_email = (lead.get(SheetColumns.EMAIL.value) or '').strip().lower()
+            if lead_email:
+                lead_index_map[lead_email] = (index, lead)
+        return lead_index_map
+
+    def _check_single_inbox(self, config, lead_index_map=None, pending_writes=None, queued_replies=None):
+        # Without a shared batch, flush this inbox's replies once it has been checked
+        owns_writes = pending_writes is None
+        if owns_writes:
+            pending_writes = PendingSheetWrites()
+            queued_replies = []
+        try:
+            mail = self._get_connection(config)
 
             # Get all leads first to check which email threads to look for
-            leads = get_lead_data(Config.STARTING_ROW)
-            lead_emails = {lead.get(SheetColumns.EMAIL.value, '').lower(): lead for lead in leads}
+            if lead_index_map is None:
+                lead_index_map = self._build_lead_index()
+            elif isinstance(lead_index_map, Future):
+                lead_index_map = lead_index_map.result()  # Prefetched by check_replies
             
-            logging.info(f"Checking threads for {len(lead_emails)} leads")
+            logging.info(f"Checking threads for {len(lead_index_map)} leads")
 
-            # Search for all messages first
-            _, messages = mail.search(None, 'ALL')
+            # Let the server filter to mail sent by leads; a thread whose latest message is
+            # from a lead always contains a message FROM that lead
+            _, messages = mail.search(None, build_from_search(lead_index_map))
             
             if not messages[0]:
                 logging.info("No messages found in inbox")
@@ -56,83 +331,131 @@ class EmailMonitor:
             message_nums.reverse()
 
             processed_threads = set()  # Track processed email threads to avoid duplicates
+            processed_latest = set()  # Latest message of each handled thread; a lead may have sent several of its messages
+
+            # Servers with THREAD=REFS return every thread in one command instead of a SEARCH per message
+            thread_map = None
+            if 'THREAD=REFS' in mail.session_capabilities:
+                _, thread_data = mail.thread('REFS', 'UTF-8', 'ALL')
+                thread_map = parse_thread_response(b''.join(d for d in thread_data if d))
+
+            # Fetch only the headers of every message, in batched commands, to filter by participant
+            message_headers = self._fetch_messages(mail, message_nums, HEADER_FETCH)
 
             for num in message_nums:
                 try:
-                    _, msg_data = mail.fetch(num, '(RFC822)')
-                    email_message = email.message_from_bytes(msg_data[0][1])
+                    email_message = message_headers.get(num)
+                    if email_message is None:
+                        continue
                     
                     # Get participants from From, To, Cc fields
                     participants = self._get_thread_participants(email_message)
                     thread_id = email_message.get('Message-ID', '') or email_message.get('Thread-Index', '')
                     
                     # Check if any participant is in our leads
-                    matching_leads = [email for email in participants if email.lower() in lead_emails]
+                    matching_leads = [email for email in participants if email in lead_index_map]
                     
                     if matching_leads and thread_id not in processed_threads:
                         lead_email = matching_leads[0]
                         processed_threads.add(thread_id)
                         
-                        # Get the full thread
-                        thread_messages = self._get_thread_messages(mail, email_message)
-                        latest_message = thread_messages[-1]  # Most recent message
+                        # Get the thread headers
+                        thread_messages = self._get_thread_messages(mail, email_message, num, thread_map) or [(num, email_message)]
+                        latest_num, latest_headers = thread_messages[-1]  # Most recent message
+                        if latest_num in processed_latest:
+                            continue  # Thread already handled through another of its messages
+                        processed_latest.add(latest_num)
                         
                         # Check if latest message is from lead
-                        latest_sender = self._parse_email_address(latest_message['From'])
-                        if latest_sender.lower() == lead_email.lower():
+                        latest_sender = self._parse_email_address(latest_headers['From'])
+                        if latest_sender.strip().lower() == lead_email:
+                            reply_key = (latest_headers.get('Message-ID', ''), lead_email)
+                            if reply_key[0] and self._is_seen(reply_key):
+                                continue  # Already recorded in an earlier cycle
+                            
                             logging.info(f"Found latest reply from lead: {lead_email}")
+                            # Only now download the full message, for its body
+                            latest_message = self._fetch_messages(mail, [latest_num], FULL_MESSAGE_FETCH, headers_only=False)[latest_num]
                             body = self._get_email_body(latest_message)
-                            self._update_lead_in_sheet(lead_email, body)
+                            row_index = self._update_lead_in_sheet(lead_email, body, lead_index_map, pending_writes)
+                            if reply_key[0]:
+                                # Marked seen by _flush_replies, once the batch holding its row is saved
+                                queued_replies.append((reply_key, row_index))
 
+                except (imaplib.IMAP4.abort, OSError):
+                    raise  # The connection is gone; let the outer handler drop it
                 except Exception as e:
                     logging.error(f"Error processing message: {e}")
                     continue
 
-            mail.close()
-            mail.logout()
+            # Leave the connection logged in and selected for the next cycle
             return True
 
+        except (imaplib.IMAP4.abort, OSError) as e:
+            logging.error(f"Connection error checking inbox: {str(e)}")
+            self._drop_connection(config)
+            return False
         except Exception as e:
             logging.error(f"Error checking inbox: {str(e)}")
             return False
+        finally:
+            if owns_writes:
+                self._flush_replies(pending_writes, queued_replies)
+
+    def _is_seen(self, reply_key) -> bool:
+        with self._seen_lock:
+            return reply_key in self._seen_replies
+
+    def _mark_seen(self, reply_key):
+        with self._seen_lock:
+            if reply_key in self._seen_replies:
+                return
+            self._seen_replies.add(reply_key)
+            self._seen_order.append(reply_key)
+            if len(self._seen_order) > SEEN_MESSAGE_LIMIT:
+                self._seen_replies.discard(self._seen_order.popleft())
 
     def _get_thread_participants(self, email_message):
-        """Extract all email addresses from message headers"""
-        participants = set()
-        
-        # Check From, To, and Cc fields
-        for header in ['From', 'To', 'Cc']:
-            addresses = email_message.get(header, '')
-            if addresses:
-                # Simple email extraction - could be made more robust
-                emails = [self._parse_email_address(addr) for addr in addresses.split(',')]
-                participants.update(emails)
-        
-        return participants
+        """Extract all normalized email addresses from message headers"""
+        # Check From, To, and Cc fields; getaddresses copes with quoted commas and groups
+        addresses = getaddresses([email_message.get(header, '') for header in ('From', 'To', 'Cc')])
+        return {address.strip().lower() for _, address in addresses if address}
 
-    def _get_thread_messages(self, mail, reference_message):
-        """Get all messages in the same thread"""
-        thread_messages = []
-        references = reference_message.get('References', '') or reference_message.get('In-Reply-To', '')
-        message_id = reference_message.get('Message-ID', '')
-        
-        # Search for messages in the same thread
-        search_criteria = f'(OR HEADER References "{references}" HEADER Message-ID "{message_id}")'
-        _, messages = mail.search(None, search_criteria)
+    def _fetch_messages(self, mail, message_nums, message_parts, headers_only=True):
+        """Fetch many messages with batched FETCH commands, returned by sequence number"""
+        messages = {}
+        for start in range(0, len(message_nums), FETCH_CHUNK_SIZE):
+            chunk = message_nums[start:start + FETCH_CHUNK_SIZE]
+            _, data = mail.fetch(b','.join(chunk), message_parts)
+            for item in data:
+                # Message data comes back as (b'<num> (BODY[...] {size}', payload) tuples
+                if isinstance(item, tuple):
+                    messages[item[0].split()[0]] = MESSAGE_PARSER.parsebytes(item[1], headersonly=headers_only)
+        return messages
+
+    def _get_thread_messages(self, mail, reference_message, num=None, thread_map=None):
+        """Get (sequence number, headers) for all messages in the same thread, oldest first"""
+        if thread_map is not None:
+            thread_nums = thread_map.get(num, [num])
+        else:
+            references = reference_message.get('References', '') or reference_message.get('In-Reply-To', '')
+            message_id = reference_message.get('Message-ID', '')
+            
+            # Search for messages in the same thread
+            search_criteria = f'(OR HEADER References "{references}" HEADER Message-ID "{message_id}")'
+            _, messages = mail.search(None, search_criteria)
+            thread_nums = messages[0].split()
         
-        for num in messages[0].split():
-            _, msg_data = mail.fetch(num, '(RFC822)')
-            thread_messages.append(email.message_from_bytes(msg_data[0][1]))
+        thread_messages = list(self._fetch_messages(mail, thread_nums, HEADER_FETCH).items())
         
         # Sort by date
-        thread_messages.sort(key=lambda m: email.utils.parsedate_to_datetime(m['Date']))
+        thread_messages.sort(key=lambda item: email.utils.parsedate_to_datetime(item[1]['Date']))
         return thread_messages
 
     def _parse_email_address(self, from_header):
         # Extract email from "Name <email@domain.com>" format
-        if '<' in from_header:
-            return from_header.split('<')[1].split('>')[0]
-        return from_header
+        addresses = getaddresses([from_header or ''])
+        return addresses[0][1] if addresses else ''
 
     def _decode_header(self, header):
         if header is None:
@@ -143,28 +466,27 @@ class EmailMonitor:
         return decoded_header
 
     def _get_email_body(self, email_message):
-        if email_message.is_multipart():
-            for part in email_message.walk():
-                if part.get_content_type() == "text/plain":
-                    return part.get_payload(decode=True).decode()
-        else:
-            return email_message.get_payload(decode=True).decode()
-        return ""
+        # Prefer the plain text part; HTML-only replies are converted when the sheet is updated
+        part = email_message.get_body(preferencelist=('plain', 'html'))
+        if part is None:
+            return ""
+        try:
+            return part.get_content()  # Handles transfer encoding and charset
+        except LookupError:
+            # Unknown charset declared by the sender
+            return part.get_payload(decode=True).decode('utf-8', errors='replace')
 
     def _convert_html_to_text(self, html_content: str) -> str:
         """Convert HTML content to plain text while preserving structure"""
         try:
-            # First try to parse with BeautifulSoup to clean the HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Initialize html2text
-            h = html2text.HTML2Text()
-            h.ignore_links = False
-            h.body_width = 0  # Don't wrap text
-            h.protect_links = True  # Keep the full URLs
-            
-            # Convert to markdown-style text
-            text = h.handle(str(soup))
+            if html_content.count('<') < MIN_HTML_TAG_MARKERS:
+                # Mostly plain text (typical replies); running the converter would only cost time
+                text = _TAG_RE.sub('', html_content)
+            else:
+                body_match = BODY_RE.search(html_content)
+                markup = body_match.group(1) if body_match else html_content
+                # Convert to markdown-style text; html2text parses the HTML itself
+                text = make_html2text().handle(SCRIPT_STYLE_RE.sub('', markup))
             
             # Clean up extra whitespace while preserving structure
             lines = [line.strip() for line in text.splitlines()]
@@ -175,100 +497,77 @@ class EmailMonitor:
             logging.error(f"Error converting HTML to text: {e}")
             return html_content  # Return original content if conversion fails
 
-    def _update_lead_in_sheet(self, from_email: str, reply_body: str):
-        """Update sheet with new message, handling HTML conversion"""
-        leads = get_lead_data(Config.STARTING_ROW)
+    def _update_lead_in_sheet(self, from_email: str, reply_body: str, lead_index_map, pending_writes):
+        """Queue the sheet update for a new message; returns the row queued, or None if no write is needed"""
         logging.info(f"Searching for email match: {from_email}")
         
-        for index, lead in enumerate(leads, start=Config.STARTING_ROW):
-            lead_email = lead.get(SheetColumns.EMAIL.value, '')
-            logging.info(f"Comparing with lead email: {lead_email}")
-            
-            if lead_email.lower() == from_email.lower():
-                logging.info(f"Found matching email at row {index}")
-                current_status = lead.get(SheetColumns.EMAIL_STATUS.value, '')
-                new_status = EmailStatus.REPLIED.value if current_status == EmailStatus.SENT.value else current_status
-                
-                # Convert any HTML content in the reply to plain text
-                clean_reply = self._convert_html_to_text(reply_body)
-                logging.info(f"Cleaned reply: {clean_reply[:100]}...")  # Log first 100 chars
-                
-                # Get existing conversation history and clean it
-                existing_history = lead.get(SheetColumns.CONVERSATION_HISTORY.value, '')
-                if existing_history:
-                    existing_history = self._convert_html_to_text(existing_history)
-                
-                # Format new conversation entry
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                new_entry = f"\n\nClient Reply ({timestamp}):\n{clean_reply}"
-                
-                # Combine histories
-                updated_history = f"{existing_history}{new_entry}" if existing_history else new_entry
-                
-                # Create update payload
-                update_payload = {
-                    SheetColumns.LAST_MESSAGE.value: clean_reply,
-                    SheetColumns.LAST_SENDER.value: SenderType.CLIENT.value,
-                    SheetColumns.EMAIL_STATUS.value: new_status,
-                    SheetColumns.CONVERSATION_HISTORY.value: updated_history
-                }
-                
-                logging.info(f"Updating sheet row {index} with payload: {update_payload}")
-                
-                try:
-                    update_sheet(index, update_payload)
-                    logging.info(f"Successfully updated sheet for {from_email}")
-                except Exception as e:
-                    logging.error(f"Failed to update sheet: {str(e)}")
-                    raise
-                
+        index, lead = lead_index_map.get(from_email.strip().lower(), (None, None))
+        if lead is None:
+            logging.warning(f"No matching lead found for email: {from_email}")
+            return
+
+        logging.info(f"Found matching email at row {index}")
+        
+        # Convert any HTML content in the reply to plain text
+        clean_reply = self._convert_html_to_text(reply_body)
+        logging.info(f"Cleaned reply: {clean_reply[:100]}...")  # Log first 100 chars
+        
+        # Inboxes are checked in parallel; serialize the read-modify-write of a lead's history
+        with self._lead_update_lock:
+            # The sheet already holds this reply (e.g. seen again after a restart); skip the write
+            if (lead.get(SheetColumns.LAST_SENDER.value) == SenderType.CLIENT.value
+                    and lead.get(SheetColumns.LAST_MESSAGE.value) == clean_reply):
+                logging.info(f"Reply from {from_email} already recorded, skipping update")
                 return
-                
-        logging.warning(f"No matching lead found for email: {from_email}")
+            
+            current_status = lead.get(SheetColumns.EMAIL_STATUS.value, '')
+            new_status = EmailStatus.REPLIED.value if current_status == EmailStatus.SENT.value else current_status
+            
+            # History is stored as plain text once written; only legacy rows with markup need cleaning
+            existing_history = lead.get(SheetColumns.CONVERSATION_HISTORY.value) or ''
+            if '<' in existing_history and '>' in existing_history:
+                existing_history = self._convert_html_to_text(existing_history)
+            
+            # Format new conversation entry
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            new_entry = f"\n\nClient Reply ({timestamp}):\n{clean_reply}"
+            
+            # Combine histories
+            updated_history = f"{existing_history}{new_entry}" if existing_history else new_entry
+            
+            # Create update payload
+            update_payload = {
+                SheetColumns.LAST_MESSAGE.value: clean_reply,
+                SheetColumns.LAST_SENDER.value: SenderType.CLIENT.value,
+                SheetColumns.EMAIL_STATUS.value: new_status,
+                SheetColumns.CONVERSATION_HISTORY.value: updated_history
+            }
+            
+            logging.info(f"Queueing sheet row {index} update with payload: {update_payload}")
+            pending_writes.add(index, update_payload)
+            # Keep the cached lead current so a later reply this cycle extends the same history
+            lead.update(update_payload)
+            return index
+
+def watch_emails():
+    """Watch every sender inbox with IMAP IDLE, one thread per account"""
+    monitor = EmailMonitor()
+    threads = [
+        threading.Thread(target=monitor.watch_inbox, args=(config,), name=f"watch-{config['email']}", daemon=True)
+        for config in monitor.email_configs
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
 
 def monitor_emails():
+    """Poll every sender inbox on a fixed interval; watch_emails is the IDLE-based alternative"""
     monitor = EmailMonitor()
     while True:
         try:
             monitor.check_replies()
-            time.sleep(600)  # Check every 10 minutes since we're checking all messages
+            time.sleep(POLL_INTERVAL)
         except Exception as e:
-            logging.error(f"Error in email monitoring: {e}")
-            logging.exception("Full traceback:")
-            time.sleep(60)  # Wait a minute before retrying if there's an error
-            logging.error(f"Error in email monitoring: {e}")
-            time.sleep(60)  # Wait a minute before retrying if there's an error 
-            monitor.check_replies()
-            time.sleep(600)  # Check every 10 minutes since we're checking all messages
-        except Exception as e:
-            logging.error(f"Error in email monitoring: {e}")
-            logging.exception("Full traceback:")
-            time.sleep(60)  # Wait a minute before retrying if there's an error
-            logging.error(f"Error in email monitoring: {e}")
-            time.sleep(60)  # Wait a minute before retrying if there's an error 
-            time.sleep(60)  # Wait a minute before retrying if there's an error 
-            logging.error(f"Error in email monitoring: {e}")
-            time.sleep(60)  # Wait a minute before retrying if there's an error 
-    while True:
-        try:
-            monitor.check_replies()
-            time.sleep(600)  # Check every 10 minutes since we're checking all messages
-        except Exception as e:
-            logging.error(f"Error in email monitoring: {e}")
-            logging.exception("Full traceback:")
-            time.sleep(60)  # Wait a minute before retrying if there's an error
-            logging.error(f"Error in email monitoring: {e}")
-            time.sleep(60)  # Wait a minute before retrying if there's an error 
-            time.sleep(600)  # Check every 10 minutes since we're checking all messages
-        except Exception as e:
-            logging.error(f"Error in email monitoring: {e}")
-            logging.exception("Full traceback:")
-            time.sleep(60)  # Wait a minute before retrying if there's an error
-            logging.error(f"Error in email monitoring: {e}")
-            time.sleep(60)  # Wait a minute before retrying if there's an error 
-            time.sleep(60)  # Wait a minute before retrying if there's an error
-            logging.error(f"Error in email monitoring: {e}")
-            time.sleep(60)  # Wait a minute before retrying if there's an error 
+            logging.exception(f"Error in email monitoring: {e}")
             time.sleep(60)  # Wait a minute before retrying if there's an error
-            logging.error(f"Error in email monitoring: {e}")
-            time.sleep(60)  # Wait a minute before retrying if there's an error 
\ No newline at end of file
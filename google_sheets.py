@@ -1,85 +1,154 @@
 import gspread
+from gspread.utils import rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
-from gspread.exceptions import SpreadsheetNotFound, WorksheetNotFound
+from gspread.exceptions import SpreadsheetNotFound, WorksheetNotFound, APIError
 import logging
 from config import Config
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Collection
 from constants import SheetColumns
 from http.client import RemoteDisconnected  # Add this
 import time  # Add this
+import random
+from functools import wraps
+from itertools import chain, repeat
 import json  # For better logging
-import openai  # Add this
+import threading
 import re
+import hashlib
+from disk_cache import DiskCache
 
 # Remove duplicate logging config
 logging.basicConfig(level=logging.INFO)
 
 # Google Sheets API setup
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+# Broad scopes: the service account reads and writes the sheet
+SCOPES = (
+    'https://spreadsheets.google.com/feeds',
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+)
 SERVICE_ACCOUNT_FILE = 'service_account.json'
 SPREADSHEET_ID = Config.SPREADSHEET_ID  # Add this to your Config
 
-def get_worksheet_data(worksheet_name: str, max_retries: int = 3) -> List[Dict]:
+# Sheets API quotas are per minute and tracked separately for reads and writes
+SHEETS_READS_PER_MINUTE = 60
+SHEETS_WRITES_PER_MINUTE = 60
+
+class RateLimiter:
+    """Process-wide token bucket; callers block until a request fits the quota instead of hitting 429s"""
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0  # Tokens per second
+        self.capacity = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+read_limiter = RateLimiter(SHEETS_READS_PER_MINUTE)
+write_limiter = RateLimiter(SHEETS_WRITES_PER_MINUTE)
+
+# Retry policy for Sheets calls: transient API statuses and dropped connections are retried
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503}
+RETRY_BASE_DELAY = 1  # Seconds
+RETRY_MAX_DELAY = 60  # Seconds
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before the next attempt: the server's Retry-After if given, else jittered backoff"""
+    if isinstance(error, APIError):
+        retry_after = error.response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    # Jitter keeps concurrent workers from retrying in lockstep
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) + random.uniform(0, RETRY_BASE_DELAY)
+
+def retry_with_backoff(max_retries: int = 3):
+    """Retry a Sheets call on connection drops and retryable API errors"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            attempt = 0
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except (ConnectionError, RemoteDisconnected, APIError) as e:
+                    if isinstance(e, APIError) and e.response.status_code not in RETRYABLE_STATUS_CODES:
+                        raise
+                    if attempt >= max_retries:
+                        raise
+                    attempt += 1
+                    if not isinstance(e, APIError):
+                        reset_sheet_connection()  # Reconnect on the next attempt
+                    wait_time = _retry_delay(e, attempt)
+                    logging.warning(f"{func.__name__} attempt {attempt} failed: {str(e)}. Retrying in {wait_time:.1f} seconds...")
+                    time.sleep(wait_time)
+        return wrapper
+    return decorator
+
+@retry_with_backoff()
+def get_worksheet_data(worksheet_name: str) -> List[Dict]:
     """
     Fetches data from specified worksheet and returns as list of dictionaries
     """
-    retry_count = 0
-    while retry_count < max_retries:
-        try:
-            # Get the worksheet
-            sheet = connect_to_sheet().worksheet(worksheet_name)
-            
-            # Get all values including headers
-            all_values = sheet.get_all_values()
-            if not all_values:
-                logging.error(f"No data found in worksheet: {worksheet_name}")
-                return []
-                
-            headers = all_values[0]
-            
-            # Convert rows to dictionaries
-            data = []
-            for row in all_values[1:]:  # Skip header row
-                # Pad row with empty strings if shorter than headers
-                row_data = row + [''] * (len(headers) - len(row))
-                data.append(dict(zip(headers, row_data)))
-                
-            logging.info(f"Successfully fetched {len(data)} rows from {worksheet_name}")
-            return data
-            
-        except (ConnectionError, RemoteDisconnected) as e:
-            retry_count += 1
-            wait_time = 2 ** retry_count  # Exponential backoff
-            logging.warning(f"Connection attempt {retry_count} failed: {str(e)}. Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
+    try:
+        # Get the worksheet
+        sheet = worksheet_cache.worksheet(worksheet_name)
+        
+        # Get all values including headers
+        read_limiter.acquire()
+        all_values = sheet.get_all_values()
+        if not all_values:
+            logging.error(f"No data found in worksheet: {worksheet_name}")
+            return []
             
-        except Exception as e:
-            logging.error(f"Error fetching worksheet data: {str(e)}")
-            raise
+        headers = all_values[0]
+        
+        # Convert rows to dictionaries, skipping the header row; short rows are padded
+        # with empty strings lazily since zip stops at the last header
+        data = [dict(zip(headers, chain(row, repeat('')))) for row in all_values[1:]]
             
-    raise ConnectionError(f"Failed to connect after {max_retries} attempts")
+        logging.info(f"Successfully fetched {len(data)} rows from {worksheet_name}")
+        return data
+        
+    except Exception as e:
+        logging.error(f"Error fetching worksheet data: {str(e)}")
+        raise
+
+# Constant-time membership checks for the fixed column groups
+REQUIRED_COLUMN_SET = frozenset(SheetColumns.required_columns())
+OPTIONAL_COLUMN_SET = frozenset(SheetColumns.optional_columns())
 
 class SheetValidator:
     @staticmethod
     def validate_columns(sheet_headers: List[str]) -> tuple[bool, Optional[str]]:
-        required_columns = set(SheetColumns.required_columns())
         sheet_columns = set(sheet_headers)
-        missing_required = required_columns - sheet_columns
+        missing_required = REQUIRED_COLUMN_SET - sheet_columns
         
         if missing_required:
             return False, f"Missing required columns: {', '.join(missing_required)}"
         
-        missing_optional = set(SheetColumns.optional_columns()) - sheet_columns
+        missing_optional = OPTIONAL_COLUMN_SET - sheet_columns
         if missing_optional:
             logging.warning(f"Missing optional columns: {', '.join(missing_optional)}")
         
         return True, None
 
     @staticmethod
-    def validate_column_update(column: str, headers: List[str]) -> Optional[str]:
+    def validate_column_update(column: str, headers: Collection[str]) -> Optional[str]:
         if column not in headers:
             # If it's an optional column that doesn't exist, create it
-            if column in SheetColumns.optional_columns():
+            if column in OPTIONAL_COLUMN_SET:
                 logging.info(f"Creating missing optional column: {column}")
                 return None
             return f"Cannot update non-existent column: {column}"
@@ -89,19 +158,26 @@ class GoogleSheetManager:
     def __init__(self):
         self.spreadsheet = connect_to_sheet()
         try:
-            self.sheet = self.spreadsheet.worksheet("Leads")
+            self.sheet = worksheet_cache.worksheet("Leads")
         except WorksheetNotFound:
             logging.error("'Leads' worksheet not found")
             logging.info("Available worksheets:", self.spreadsheet.worksheets())
             raise
         
+        read_limiter.acquire()
         self.headers = self.sheet.row_values(1)
         if not self.headers:
             raise ValueError("Sheet headers not found")
+        self._index_headers()
         
         self._validate_sheet_structure()
         self._ensure_optional_columns()
 
+    def _index_headers(self):
+        """Precompute header lookups; call again whenever self.headers changes"""
+        self._header_index = {header: col for col, header in enumerate(self.headers, start=1)}
+        self._header_set = set(self.headers)
+
     def _validate_sheet_structure(self):
         is_valid, error_message = SheetValidator.validate_columns(self.headers)
         if not is_valid:
@@ -109,53 +185,145 @@ class GoogleSheetManager:
 
     def _ensure_optional_columns(self):
         """Create any missing optional columns"""
-        missing_columns = set(SheetColumns.optional_columns()) - set(self.headers)
+        missing_columns = [col for col in SheetColumns.optional_columns() if col not in self._header_set]
         if missing_columns:
-            last_col = len(self.headers) + 1
-            for col in missing_columns:
-                self.sheet.update_cell(1, last_col, col)
-                self.headers.append(col)
-                last_col += 1
+            first_col = len(self.headers) + 1
+            # Write all new headers as one contiguous range
+            header_range = f"{rowcol_to_a1(1, first_col)}:{rowcol_to_a1(1, first_col + len(missing_columns) - 1)}"
+            write_limiter.acquire()
+            self.sheet.batch_update([{'range': header_range, 'values': [missing_columns]}], value_input_option='USER_ENTERED')
+            self.headers.extend(missing_columns)
+            self._index_headers()
+            worksheet_cache.invalidate("Leads")  # Cached header map is missing the new columns
             logging.info(f"Created missing optional columns: {missing_columns}")
 
     def update_cells(self, row: int, updates: Dict[str, Any]):
+        valid_updates = {}
         for column, value in updates.items():
-            error = SheetValidator.validate_column_update(column, self.headers)
+            error = SheetValidator.validate_column_update(column, self._header_set)
             if error:
                 logging.warning(error)
                 continue
-            
-            # If column doesn't exist, add it
-            if column not in self.headers:
-                self._ensure_optional_columns()
-            
-            col_index = self.headers.index(column) + 1
-            self.sheet.update_cell(row, col_index, value)
-            logging.info(f"Updated {column} for row {row}")
+            valid_updates[column] = value
+        
+        # If any column doesn't exist, add the missing ones once
+        if any(column not in self._header_set for column in valid_updates):
+            self._ensure_optional_columns()
+        
+        if not valid_updates:
+            return
+        
+        # Write all cells for the row in one request
+        write_limiter.acquire()
+        self.sheet.batch_update([
+            {'range': rowcol_to_a1(row, self._header_index[column]), 'values': [[value]]}
+            for column, value in valid_updates.items()
+        ], value_input_option='USER_ENTERED')
+        logging.info(f"Updated {', '.join(valid_updates)} for row {row}")
+
+# Authorized spreadsheet handle shared by every sheet operation; built on first use
+_spreadsheet = None
+_spreadsheet_lock = threading.RLock()  # Re-entrant: a retried connect may reset the handle
+
+def reset_sheet_connection() -> None:
+    """Drop the cached spreadsheet handle so the next call re-authorizes"""
+    global _spreadsheet
+    with _spreadsheet_lock:
+        _spreadsheet = None
+    worksheet_cache.invalidate()
+
+class WorksheetCache:
+    """Worksheet handles and their header -> column maps, fetched once per worksheet"""
+
+    def __init__(self):
+        self._worksheets = {}
+        self._header_indexes = {}
+        self._lock = threading.Lock()
+
+    def worksheet(self, name: str):
+        with self._lock:
+            sheet = self._worksheets.get(name)
+        if sheet is None:
+            read_limiter.acquire()
+            sheet = connect_to_sheet().worksheet(name)
+            with self._lock:
+                self._worksheets[name] = sheet
+        return sheet
+
+    def header_index(self, name: str, refresh: bool = False) -> Dict[str, int]:
+        """Map each header in row 1 to its 1-based column index"""
+        with self._lock:
+            index = None if refresh else self._header_indexes.get(name)
+        if index is None:
+            read_limiter.acquire()
+            headers = self.worksheet(name).row_values(1)
+            index = {header: col for col, header in enumerate(headers, start=1)}
+            with self._lock:
+                self._header_indexes[name] = index
+        return index
+
+    def preload(self) -> None:
+        """Cache every worksheet handle from a single spreadsheet metadata read"""
+        read_limiter.acquire()
+        worksheets = connect_to_sheet().worksheets()
+        with self._lock:
+            for sheet in worksheets:
+                self._worksheets[sheet.title] = sheet
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._worksheets.clear()
+                self._header_indexes.clear()
+            else:
+                self._worksheets.pop(name, None)
+                self._header_indexes.pop(name, None)
+
+worksheet_cache = WorksheetCache()
+
+def warm_up() -> None:
+    """Open the spreadsheet and cache worksheet handles and the Leads headers before the first request"""
+    try:
+        worksheet_cache.preload()
+        worksheet_cache.header_index("Leads")
+        logging.info("Sheet connection warmed up")
+    except Exception as e:
+        # Not fatal; the first real request will connect instead
+        logging.warning(f"Sheet warm-up failed: {str(e)}")
+
+def get_column_index(name: str, columns) -> Dict[str, int]:
+    """Header map for a worksheet, re-read once if any of the columns is missing from the cached copy"""
+    header_index = worksheet_cache.header_index(name)
+    if any(column not in header_index for column in columns):
+        header_index = worksheet_cache.header_index(name, refresh=True)
+    return header_index
 
 def connect_to_sheet():
+    """Return the cached spreadsheet handle, connecting on first use"""
+    global _spreadsheet
+    with _spreadsheet_lock:
+        if _spreadsheet is None:
+            _spreadsheet = _open_spreadsheet()
+        return _spreadsheet
+
+@retry_with_backoff()
+def _open_spreadsheet():
     """Connect to Google Sheets with better error handling"""
     try:
-        # Use broader scope for full access
-        scopes = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        
         creds = ServiceAccountCredentials.from_json_keyfile_name(
-            'service_account.json', 
-            scopes
+            SERVICE_ACCOUNT_FILE, 
+            SCOPES
         )
         
         client = gspread.authorize(creds)
         
         try:
-            spreadsheet = client.open_by_key(Config.SPREADSHEET_ID)
+            read_limiter.acquire()
+            spreadsheet = client.open_by_key(SPREADSHEET_ID)
             logging.info(f"Successfully connected to spreadsheet: {spreadsheet.title}")
             return spreadsheet
         except SpreadsheetNotFound:
-            logging.error(f"Spreadsheet not found with ID: {Config.SPREADSHEET_ID}")
+            logging.error(f"Spreadsheet not found with ID: {SPREADSHEET_ID}")
             logging.info("Please check:")
             logging.info("1. Spreadsheet ID is correct")
             logging.info("2. Service account email has been shared with the spreadsheet")
@@ -169,42 +337,68 @@ def connect_to_sheet():
         logging.error(f"Error connecting to Google Sheets: {str(e)}")
         raise
 
+# Lead rows are re-read at most this often; writes through this module invalidate the cache
+LEAD_DATA_TTL = 60
+_lead_data_cache: Dict[tuple, tuple] = {}
+_lead_data_lock = threading.Lock()
+
+def invalidate_lead_data_cache() -> None:
+    with _lead_data_lock:
+        _lead_data_cache.clear()
+
 def get_lead_data(start_row: int, end_row: int = 0) -> List[Dict[str, Any]]:
+    """Fetch lead data from Google Sheet, served from a short-lived cache"""
+    key = (start_row, end_row)
+    with _lead_data_lock:
+        cached = _lead_data_cache.get(key)
+    if cached and time.monotonic() - cached[0] < LEAD_DATA_TTL:
+        # Hand out copies; callers update lead dicts in place
+        return [dict(lead) for lead in cached[1]]
+
+    leads = _fetch_lead_data(start_row, end_row)
+    with _lead_data_lock:
+        _lead_data_cache[key] = (time.monotonic(), leads)
+    return [dict(lead) for lead in leads]
+
+@retry_with_backoff()
+def _fetch_lead_data(start_row: int, end_row: int = 0) -> List[Dict[str, Any]]:
     """Fetch lead data from Google Sheet"""
     try:
-        logging.info("Successfully connected to spreadsheet: Sales Tracker KX02")
-        sheet = connect_to_sheet().worksheet("Leads")
+        if end_row and end_row < start_row:
+            return []
         
-        # Get all values including headers
-        all_values = sheet.get_all_values()
-        if not all_values:
+        sheet = worksheet_cache.worksheet("Leads")
+        
+        def row_window(col_count: int) -> str:
+            # An open end row (e.g. "A2:Z") runs to the last row with data
+            last_col = re.sub(r'\d+$', '', rowcol_to_a1(1, col_count))
+            return f"A{start_row}:{last_col}{end_row or ''}"
+        
+        # Fetch the header row and only the requested rows in one values.batchGet
+        read_limiter.acquire()
+        header_rows, rows = sheet.batch_get(['1:1', row_window(sheet.col_count)])
+        if not header_rows and not rows:
             return []
             
-        headers = all_values[0]
+        headers = header_rows[0] if header_rows else []
         
         # Debug the actual headers
-        logging.info(f"Actual sheet headers: {headers}")
+        logging.debug("Actual sheet headers: %s", headers)  # Lazy: only formatted when DEBUG is on
         
-        # Calculate end row
-        if end_row == 0:
-            end_row = len(all_values)
+        if len(headers) > sheet.col_count:
+            # Columns were added since the worksheet handle was cached; re-read at full width
+            worksheet_cache.invalidate("Leads")
+            read_limiter.acquire()
+            rows = sheet.get(row_window(len(headers)))
         
-        # Convert row data to dictionaries
-        leads = []
-        for row_idx in range(start_row - 1, min(end_row, len(all_values))):
-            row = all_values[row_idx]
-            lead = {}
-            
-            # Print the raw row data
-            logging.info(f"Raw row data: {row}")
-            
-            for col_idx, header in enumerate(headers):
-                value = row[col_idx] if col_idx < len(row) else ""
-                lead[header] = value if value != "" else None
-                
-            logging.info(f"Processed lead data: {lead}")
-            leads.append(lead)
-            
+        # Convert row data to dictionaries; empty and missing trailing cells become None
+        padding = [None] * len(headers)
+        leads = [
+            dict(zip(headers, [value or None for value in row] + padding))
+            for row in rows
+        ]
+        
+        logging.info(f"Loaded {len(leads)} leads")
         return leads
         
     except Exception as e:
@@ -214,11 +408,12 @@ def get_lead_data(start_row: int, end_row: int = 0) -> List[Dict[str, Any]]:
 def get_agency_worksheet():
     """Returns the agency info worksheet"""
     try:
-        return connect_to_sheet().worksheet("Agency Info")
+        return worksheet_cache.worksheet("Agency Info")
     except Exception as e:
         logging.error(f"Error accessing agency worksheet: {str(e)}")
         return None
 
+@retry_with_backoff()
 def get_agency_worksheet_data() -> Dict:
     """Fetches and structures all agency data from the worksheet"""
     try:
@@ -227,6 +422,7 @@ def get_agency_worksheet_data() -> Dict:
             raise ValueError("Could not access agency worksheet")
             
         # Get all values from the worksheet
+        read_limiter.acquire()
         all_rows = worksheet.get_all_values()
         
         # Initialize data structures
@@ -237,6 +433,12 @@ def get_agency_worksheet_data() -> Dict:
             'single_values': {}
         }
         
+        # Categories whose rows are collected into lists
+        list_categories = {
+            'Services': agency_data['services'],
+            'Company Structure': agency_data['company_structure'],
+        }
+        
         # Process each row
         for row in all_rows:
             if len(row) < 2:  # Skip empty rows
@@ -249,14 +451,13 @@ def get_agency_worksheet_data() -> Dict:
                 continue
                 
             # Group data by category
-            if category == 'Services':
-                agency_data['services'].append(description)
-            elif category == 'Company Structure':
-                agency_data['company_structure'].append(description)
+            category_list = list_categories.get(category)
+            if category_list is not None:
+                category_list.append(description)
             elif category == 'Portfolio Projects':
                 # Parse portfolio project entries
-                if ' - ' in description:
-                    name, details = description.split(' - ', 1)
+                name, separator, details = description.partition(' - ')
+                if separator:
                     agency_data['portfolio_projects'].append({
                         'name': name.strip(),
                         'details': details.strip()
@@ -284,19 +485,33 @@ def get_agency_worksheet_data() -> Dict:
             'pricing_info': agency_data['single_values'].get('Pricing', '')
         }
         
-        logging.info(f"Raw agency data dump: {json.dumps(formatted_data, indent=2)}")
+        # Only pay for the JSON dump when debug output is on
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"Raw agency data dump: {json.dumps(formatted_data, indent=2)}")
         return formatted_data
         
     except Exception as e:
         logging.error(f"Error fetching agency worksheet data: {str(e)}")
         raise
 
+# Structured agency profiles keyed by a hash of the raw worksheet data; the sheet rarely changes
+agency_info_cache = DiskCache('agency_info', expire=86400*7)
+
 def get_agency_info() -> Dict:
     """Returns agency information using OpenAI to process and structure the data"""
+    from openai_client import get_openai_client  # Only needed here; keeps sheet reads free of the OpenAI import cost
+
     try:
         # Get raw data from worksheet
         agency_data = get_agency_worksheet_data()
         
+        # Reuse the profile built from identical worksheet data instead of calling OpenAI again
+        cache_key = hashlib.sha256(json.dumps(agency_data, sort_keys=True).encode()).hexdigest()
+        cached_info = agency_info_cache.get(cache_key)
+        if cached_info is not None:
+            logging.info("Using cached agency information")
+            return cached_info
+        
         # Format data for OpenAI processing
         data_dump = json.dumps(agency_data, indent=2)
         # Log the raw data from worksheet
@@ -339,10 +554,11 @@ def get_agency_info() -> Dict:
 
         """
 
-        response = openai.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="gpt-4o",  # Fixed typo in model name from gpt-4o to gpt-4
             messages=[{"role": "user", "content": processing_prompt}],
-            temperature=0.3
+            temperature=0.3,
+            response_format={"type": "json_object"}  # Guarantees a bare JSON object
         )
 
         # Get the response content and clean it
@@ -351,17 +567,9 @@ def get_agency_info() -> Dict:
         try:
             # Log the raw response for debugging
             logging.info(f"Raw OpenAI response: {response_content}")
-            # Strip quotes if response is wrapped in them
-            # Clean response content to extract just the JSON
-            response_content = re.sub(r'^[^{]*({.*})[^}]*$', r'\1', response_content)
-            # Remove any escaped quotes around the JSON
-            response_content = re.sub(r'^"({.*})"$', r'\1', response_content)
-            # Remove any remaining non-JSON text
-            response_content = re.sub(r'^[^{]*({[\s\S]*})[^}]*$', r'\1', response_content)
-            # Log the processed response content
-            logging.info(f"Processed response content: {response_content}")
             agency_info = json.loads(response_content)
             logging.info("Successfully processed agency information")
+            agency_info_cache.set(cache_key, agency_info)
             return agency_info
             
         except json.JSONDecodeError:
@@ -383,35 +591,128 @@ def get_agency_info() -> Dict:
             }
         }
 
+@retry_with_backoff()
 def update_sheet(row_index: int, updates: Dict[str, Any]) -> None:
     """Update specific cells in the sheet for a given row"""
     try:
         logging.info(f"Updating row {row_index} with: {updates}")
         
         # Get the worksheet
-        sheet = connect_to_sheet().worksheet("Leads")
+        sheet = worksheet_cache.worksheet("Leads")
         
         # Convert column names to indices
-        header_row = sheet.row_values(1)
+        header_index = get_column_index("Leads", updates)
         updates_with_indices = {}
         
         for col_name, value in updates.items():
-            try:
-                col_index = header_row.index(col_name) + 1  # 1-based indexing
-                updates_with_indices[col_index] = value
-                logging.info(f"Mapped column {col_name} to index {col_index}")
-            except ValueError:
-                logging.error(f"Column {col_name} not found in sheet headers: {header_row}")
-        
-        # Update each cell
-        for col_index, value in updates_with_indices.items():
-            try:
-                sheet.update_cell(row_index, col_index, value)
-                logging.info(f"Updated cell ({row_index}, {col_index}) with value: {value}")
-            except Exception as e:
-                logging.error(f"Failed to update cell ({row_index}, {col_index}): {str(e)}")
-                raise
+            col_index = header_index.get(col_name)  # 1-based indexing
+            if col_index is None:
+                logging.error(f"Column {col_name} not found in sheet headers: {list(header_index)}")
+                continue
+            updates_with_indices[col_index] = value
+            logging.debug("Mapped column %s to index %s", col_name, col_index)
+        
+        if not updates_with_indices:
+            return
+        
+        # Write every cell of the row in one request; USER_ENTERED matches update_cell
+        try:
+            write_limiter.acquire()
+            sheet.batch_update([
+                {'range': rowcol_to_a1(row_index, col_index), 'values': [[value]]}
+                for col_index, value in updates_with_indices.items()
+            ], value_input_option='USER_ENTERED')
+            logging.info(f"Updated {len(updates_with_indices)} cells in row {row_index}")
+        except Exception as e:
+            logging.error(f"Failed to update row {row_index}: {str(e)}")
+            raise
+        finally:
+            # Any attempted write makes cached lead rows stale
+            invalidate_lead_data_cache()
                 
     except Exception as e:
         logging.error(f"Error in update_sheet: {str(e)}")
         raise
+
+
+@retry_with_backoff()
+def batch_update_sheet(row_updates: Dict[int, Dict[str, Any]]) -> None:
+    """Update cells across many rows with a single values.batchUpdate request"""
+    if not row_updates:
+        return
+
+    try:
+        logging.info(f"Batch updating {len(row_updates)} rows")
+
+        sheet = worksheet_cache.worksheet("Leads")
+        # Accept both enum members and raw column names
+        header_index = get_column_index("Leads", {
+            getattr(col_name, 'value', col_name) for updates in row_updates.values() for col_name in updates
+        })
+
+        data = []
+        for row_index, updates in row_updates.items():
+            for col_name, value in updates.items():
+                # Accept both enum members and raw column names/values
+                col_name = getattr(col_name, 'value', col_name)
+                value = getattr(value, 'value', value)
+                col_index = header_index.get(col_name)  # 1-based indexing
+                if col_index is None:
+                    logging.error(f"Column {col_name} not found in sheet headers: {list(header_index)}")
+                    continue
+                data.append({
+                    'range': rowcol_to_a1(row_index, col_index),
+                    'values': [[value]]
+                })
+
+        if not data:
+            return
+
+        # USER_ENTERED matches the semantics of the per-cell update_cell path
+        write_limiter.acquire()
+        sheet.batch_update(data, value_input_option='USER_ENTERED')
+        invalidate_lead_data_cache()  # Cached lead rows are now stale
+        logging.info(f"Batch updated {len(data)} cells")
+
+    except Exception as e:
+        logging.error(f"Error in batch_update_sheet: {str(e)}")
+        raise
+
+class PendingSheetWrites:
+    """Collects per-row sheet updates so they can be flushed in one request"""
+
+    def __init__(self):
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()  # Rows are added from worker threads
+
+    def add(self, row_index: int, updates: Dict[str, Any]) -> None:
+        with self._lock:
+            self._rows.setdefault(row_index, {}).update(updates)
+
+    def flush(self) -> Dict[int, Dict[str, Any]]:
+        """Write all pending rows, falling back to per-row updates if the batch fails.
+
+        Returns the rows that could not be written (empty when everything was saved).
+        """
+        with self._lock:
+            rows, self._rows = self._rows, {}
+        if not rows:
+            return {}
+
+        try:
+            batch_update_sheet(rows)
+            return {}
+        except Exception as e:
+            logging.warning(f"Batch update failed, falling back to per-row updates: {str(e)}")
+
+        failed_rows = {}
+        for row_index, updates in rows.items():
+            try:
+                update_sheet(row_index, {
+                    getattr(col, 'value', col): getattr(value, 'value', value)
+                    for col, value in updates.items()
+                })
+            except Exception as row_error:
+                logging.error(f"Failed to write row {row_index}: {str(row_error)}")
+                failed_rows[row_index] = updates
+        return failed_rows
@@ -0,0 +1,23 @@
+import httpx
+import openai
+from functools import lru_cache
+from config import Config
+
+# Leads are processed concurrently, so size the pool above Config.MAX_WORKERS
+OPENAI_MAX_CONNECTIONS = 64
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 32
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> openai.OpenAI:
+    """Build the OpenAI client once so every call reuses pooled keep-alive connections"""
+    return openai.OpenAI(
+        api_key=Config.OPENAI_API_KEY,
+        http_client=httpx.Client(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            # Long generations (proposals) can take well over a minute
+            timeout=httpx.Timeout(120, connect=10)
+        )
+    )
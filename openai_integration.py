@@ -1,29 +1,205 @@
 import openai
 import logging
+from openai_client import get_openai_client
 from config import Config
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 from typing import Dict, Any, Tuple, List
-import markdown
-from weasyprint import HTML
-from portfolio_assets import PortfolioAssets
-from sheet_utils import SheetColumns  # Add this import
+from portfolio_assets import get_portfolio_assets
+from constants import SheetColumns
 import re
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import time
 import json
+import hashlib
+import threading
+from disk_cache import DiskCache
 
 
-openai.api_key = Config.OPENAI_API_KEY
 logging.basicConfig(level=logging.INFO)
 
+# Shared session for company website scraping: pooled keep-alive connections, so the
+# HTTPS -> HTTP fallback and redirects on the same host skip a fresh handshake
+scrape_session = requests.Session()
+scrape_session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate'
+})
+# Retry throttled/flaky responses only; unreachable hosts fail fast to the next protocol
+_scrape_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=max(Config.MAX_WORKERS, 10),
+    max_retries=Retry(total=2, connect=0, backoff_factor=0.3,
+                      status_forcelist=(429, 502, 503, 504), raise_on_status=False)
+)
+scrape_session.mount('https://', _scrape_adapter)
+scrape_session.mount('http://', _scrape_adapter)
+
+# SUBJECT:/BODY: sections of the validate_final_content response
+VALIDATED_SUBJECT_RE = re.compile(r'SUBJECT:\s*(.*?)\s*BODY:', re.DOTALL)
+VALIDATED_BODY_RE = re.compile(r'BODY:\s*(.*)', re.DOTALL)
+
+# Leftover sender-name placeholders (any casing) and template braces in generated replies
+RESPONSE_PLACEHOLDER_RE = re.compile(r'\[your name\]|\{\{|\}\}', re.IGNORECASE)
+
+# Template braces, [Capitalized Label] placeholders and sample names that mean an email needs cleanup
+SUSPICIOUS_CONTENT_RE = re.compile(r'\{\{|\}\}|\[[A-Z][a-zA-Z ]{1,30}\](?!\()|\b(?:ABC|XYZ|Company Name|Your Name)\b')
+
+# Only these tags feed the company summary, so the parser skips building the rest of the tree
+SCRAPE_TEXT_TAGS = ('p', 'h1', 'h2', 'h3')
+SCRAPE_TEXT_STRAINER = SoupStrainer(SCRAPE_TEXT_TAGS)
+MAX_SCRAPE_BYTES = 2_000_000  # Pathologically large pages are truncated before parsing
+
+# Calls at temperature <= 0.3 are near-deterministic extractions, so their completions are reused
+LLM_CACHE_MAX_TEMPERATURE = 0.3
+llm_response_cache = DiskCache('llm_responses', expire=86400)
+llm_cache_stats = {'hits': 0, 'misses': 0}
+_llm_cache_stats_lock = threading.Lock()
+WHITESPACE_RE = re.compile(r'\s+')
+
+def llm_cache_key(model: str, messages: List[Dict], temperature: float, max_tokens: int = None, response_format: Dict = None, cache: bool = None) -> str:
+    """Hash a request with whitespace-normalized messages, or None if it shouldn't be cached"""
+    # cache=None caches by temperature; True/False force it on/off for a call
+    if cache is False or (cache is None and temperature > LLM_CACHE_MAX_TEMPERATURE):
+        return None
+    normalized = [
+        {**message, 'content': WHITESPACE_RE.sub(' ', message.get('content') or '').strip()}
+        for message in messages
+    ]
+    payload = json.dumps({
+        'model': model,
+        'messages': normalized,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'response_format': response_format
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+# Static cold email instructions; kept byte-identical across leads so the prompt prefix is cached
+COLD_EMAIL_INSTRUCTIONS = """
+Plan and write a personalized cold email for the recipient, agency and portfolio items provided by the user.
+
+First analyze the lead:
+1. Best email formula
+2. Key pain points
+3. Most relevant service
+4. Should we include portfolio examples? (true/false)
+5. If true, which specific portfolio item would be most relevant (provide file name)
+6. Call to action approach
+
+Then write the email body following that analysis. If you include a portfolio item, mention it with its url.
+
+FORMAT REQUIREMENTS:
+- Start with the OPENING LINE given by the user
+- Use single line breaks between paragraphs
+- Keep paragraphs short (2-3 sentences)
+- Based on the analysis, if required and only if required, use the CALENDAR LINK given by the user as the CTA
+- 150-200 words maximum
+- No placeholders, No example sample companies like ABC XYZ etc. No subject lines, and No signatures
+
+Writing style: conversational, casual, engaging, simple to read, simple linear active voice sentences, informational and insightful.
+
+Use the following formulas to write effective cold emails:
+
+1. AIDA: Start with an attention-grabbing subject line or opening sentence. Highlight the recipient's pain points to build interest. List the benefits and use social proof, scarcity, or exclusivity to create desire. End with a specific call to action.
+
+2. BBB: Keep the email brief, blunt, and basic. Shorten the email, get straight to the point, and use simple language.
+
+3. PAS: Identify a sore point (Problem). Emphasize the severity with examples or personal experience (Agitate). Present your solution (Solve).
+
+4. QVC: Start with a question. Highlight what makes you unique (Value Proposition). End with a strong call to action.
+
+5. PPP: Open with a genuine compliment (Praise). Show how your product/service helps (Picture). Encourage them to take action (Push).
+
+6. SCH: Introduce your product or idea (Star). Provide strong facts and reasons (Chain). End with a powerful call to action (Hook).
+
+7. SSS: Introduce the star of your story (Star). Describe the problem they face (Story). Explain how your product solves the problem (Solution).
+
+8. RDM: Use facts (Fact-packed), be brief (Telegraphic), be specific (Specific), avoid too many adjectives (Few adjectives), and make them curious (Arouse curiosity).
+
+Respond only in JSON with exactly these keys:
+{
+    "formula": "",
+    "pain_points": [],
+    "relevant_service": "",
+    "include_portfolio": false,
+    "portfolio_item": null,
+    "cta": "",
+    "email_body": ""
+}
+"""
+
+# Keys the fused cold email call must return; everything but email_body is the strategy analysis
+COLD_EMAIL_PLAN_KEYS = ("formula", "pain_points", "relevant_service", "include_portfolio", "portfolio_item", "cta", "email_body")
+
+# Static reply instructions for generate_response_email, followed by the per-lead context
+RESPONSE_EMAIL_INSTRUCTIONS = """
+Please craft a detailed response to the email conversation based on the context provided by the user + these instructions. Follow accurately and be focused.
+
+WRITING STYLE:
+- Conversational and casual
+- Simple, active voice sentences
+- Engaging and personal
+- Informational but concise
+- Natural flow without obvious formula
+
+FORMATTING REQUIREMENTS:
+- Use markdown for emphasis: **bold** for key points
+- Bold important elements like: company names, numbers, key benefits, action items
+- Format the calendar link call-to-action prominently
+- Keep paragraphs short and focused
+- Use subtle formatting - don't overdo bold text
+
+KEY ELEMENTS TO BOLD [DO NOT OVER-BOLD THINGS]:
+- Company names when mentioned
+- Key metrics or numbers
+- Primary value propositions
+- Action items or next steps
+- Important dates or timeframes
+
+EMAIL STRUCTURE (STRICT):
+1. Opening paragraph (2-3 sentences)
+2. Value proposition paragraph (2-3 sentences)
+3. Social proof or relevance paragraph (2-3 sentences)
+4. Call to action paragraph (1-2 sentences)
+
+FORMAT RULES:
+- Start with the OPENING LINE given by the user
+- Use exactly ONE line break between paragraphs
+- Keep paragraphs short and focused
+- End with clear calendar link call-to-action
+- Total length: 150-200 words maximum
+
+MUST AVOID:
+- Subject line
+- Signature block
+- Generic phrases
+- [Your Name] placeholders
+- Multiple line breaks
+- Bullet points or lists
+DO NOT use any placeholders like [Name] or [Company] or anything other placeholder
+
+Take a deep breath and think step by step.
+"""
+
 @retry(
     retry=retry_if_exception_type((openai.OpenAIError, json.JSONDecodeError)),
     wait=wait_exponential(multiplier=1, min=4, max=10),
     stop=stop_after_attempt(3)
 )
-def make_openai_call(model: str, messages: List[Dict], temperature: float = 0.7, max_tokens: int = None) -> str:
-    """Wrapper for OpenAI API calls with retry logic"""
+def make_openai_call(model: str, messages: List[Dict], temperature: float = 0.7, max_tokens: int = None, response_format: Dict = None, cache: bool = None) -> str:
+    """Wrapper for OpenAI API calls with retry logic and the persistent response cache"""
+    cache_key = llm_cache_key(model, messages, temperature, max_tokens, response_format, cache)
+    if cache_key:
+        cached = llm_response_cache.get(cache_key)
+        with _llm_cache_stats_lock:
+            llm_cache_stats['hits' if cached else 'misses'] += 1
+        if cached:
+            logging.debug("LLM cache hit for %s (%s)", model, llm_cache_stats)
+            return cached
+
     try:
         kwargs = {
             "model": model,
@@ -32,12 +208,17 @@ def make_openai_call(model: str, messages: List[Dict], temperature: float = 0.7,
         }
         if max_tokens:
             kwargs["max_tokens"] = max_tokens
+        if response_format:
+            kwargs["response_format"] = response_format
             
-        response = openai.chat.completions.create(**kwargs)
+        response = get_openai_client().chat.completions.create(**kwargs)
         if not response.choices:
             raise ValueError("No response choices returned from OpenAI")
             
-        return response.choices[0].message.content.strip()
+        content = response.choices[0].message.content.strip()
+        if cache_key and content:
+            llm_response_cache.set(cache_key, content)
+        return content
         
     except openai.OpenAIError as e:
         if 'insufficient_quota' in str(e):
@@ -47,6 +228,60 @@ def make_openai_call(model: str, messages: List[Dict], temperature: float = 0.7,
         logging.error(f"Error in make_openai_call: {str(e)}")
         raise
 
+# Streamed generations are abandoned as soon as one of these template markers leaks out
+PLACEHOLDER_MARKERS = ('{{', '}}')
+_MARKER_OVERLAP = max(map(len, PLACEHOLDER_MARKERS)) - 1
+
+@retry(
+    retry=retry_if_exception_type(openai.OpenAIError),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    stop=stop_after_attempt(3)
+)
+def stream_openai_call(model: str, messages: List[Dict], temperature: float = 0.7, max_tokens: int = None) -> str:
+    """Stream a completion, aborting early if the model emits an unresolved placeholder"""
+    kwargs = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "stream": True
+    }
+    if max_tokens:
+        kwargs["max_tokens"] = max_tokens
+
+    stream = get_openai_client().chat.completions.create(**kwargs)
+    parts = []
+    tail = ''
+    try:
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parts.append(delta)
+            # A marker can straddle two chunks, so scan the previous tail with the new text
+            window = tail + delta
+            if any(marker in window for marker in PLACEHOLDER_MARKERS):
+                logging.error("Generated response contains placeholders")
+                raise ValueError("Response generation failed - contains unresolved placeholders")
+            tail = window[-_MARKER_OVERLAP:]
+    finally:
+        stream.close()  # Stops the server-side generation when we bail out early
+
+    return ''.join(parts).strip()
+
+def select_portfolio_item(portfolio, analysis: Dict) -> Tuple[Dict, Dict]:
+    """Resolve the portfolio item recommended by an analysis into email template data"""
+    portfolio_data = {"has_portfolio": False, "assets": []}  # Default portfolio data
+    if not analysis.get('include_portfolio'):
+        return portfolio_data, None
+
+    selected_asset = portfolio.get_asset_by_name(analysis.get('portfolio_item') or '')
+    if not selected_asset:
+        logging.warning(f"Recommended portfolio item not found: {analysis.get('portfolio_item')}")
+        return portfolio_data, None
+
+    logging.info(f"Including portfolio item: {selected_asset['name']}")
+    return portfolio.format_for_email_template([selected_asset]), selected_asset
+
 def generate_cold_email_content(lead: Dict, agency_info: Dict, company_description: str) -> str:
     try:
         
@@ -62,13 +297,13 @@ def generate_cold_email_content(lead: Dict, agency_info: Dict, company_descripti
 
         ]
         
+        # Normalize the lead's keys once instead of rescanning them for every required field
+        normalized_lead = {}
+        for key, value in lead.items():
+            normalized_lead.setdefault(key.lower().replace('_', ' '), value)
+
         for field in required_lead_fields:
-            field_value = None
-            for key, value in lead.items():
-                if key.lower().replace('_', ' ') == field.lower().replace('_', ' '):
-                    field_value = value
-                    break
-            if not field_value:
+            if not normalized_lead.get(field.lower().replace('_', ' ')):
                 raise ValueError(f"Missing required lead field: {field}")
         
         # Log input data with safe gets
@@ -80,140 +315,58 @@ def generate_cold_email_content(lead: Dict, agency_info: Dict, company_descripti
             'domain': lead.get('Company Domain', '')
         }
         
-        recipient_name = lead.get('Name', '').split()[0] if lead.get('Name') else ''
-        
-        
         # Initialize portfolio
-        portfolio = PortfolioAssets()
+        portfolio = get_portfolio_assets()
         assets = portfolio.get_all_assets()
-        # Step 1: Analysis using GPT-3.5
-        analysis_prompt = f"""
-        Analyze this lead for a cold email:
-        Name: {recipient_name}
-        Role: {lead_info['role']}
-        Company: {lead_info['company']}
-        Description: {company_description or 'Not available'}
-        Headline: {lead_info['headline']}
-
-        Agency Context:
-        {agency_info}
-
-        Available Portfolio Items:
-        {json.dumps([{
-            'name': asset['name'],
-            'type': asset['type'],
-            'industry': asset['industry'],
-            'service': asset['service_type']
-        } for asset in assets], indent=2)}
-
-        Analyze and provide:
-        1. Best email formula
-        2. Key pain points
-        3. Most relevant service
-        4. Should we include portfolio examples? (true/false)
-        5. If true, which specific portfolio item would be most relevant (provide file name)
-        6. Call to action approach
-
-        Return as JSON:
-        {{
-            "formula": "",
-            "pain_points": [],
-            "relevant_service": "",
-            "include_portfolio": false,
-            "portfolio_item": null,
-            "cta": ""
-        }}
-        """
-
-        analysis_response = make_openai_call(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": analysis_prompt}],
-            temperature=0.7
-        )
-
-        logging.info(f"Raw analysis response: {analysis_response}")
-
-        try:
-            analysis = json.loads(analysis_response)
-            logging.info(f"Parsed analysis: {json.dumps(analysis, indent=2)}")
-            
-            # Validate analysis structure
-            required_keys = ["formula", "pain_points", "relevant_service", "include_portfolio", "portfolio_item", "cta"]
-            missing_keys = [key for key in required_keys if key not in analysis]
-            if missing_keys:
-                raise ValueError(f"Analysis missing required keys: {missing_keys}")
-                
-        except json.JSONDecodeError:
-            logging.error(f"Failed to parse analysis JSON: {analysis_response}")
-            raise ValueError("Analysis generation failed - invalid JSON")
-        
-        
         if not assets:
             logging.warning("No portfolio assets loaded from Drive")
 
-        # Get selected portfolio item if recommended
-        portfolio_data = {"has_portfolio": False, "assets": []}  # Default portfolio data
-        portfolio_content = "None"
-        if analysis.get('include_portfolio'):
-            selected_asset = portfolio.get_asset_by_name(analysis['portfolio_item'])
-            if selected_asset:
-                portfolio_data = portfolio.format_for_email_template([selected_asset])
-                portfolio_content = f"\n\nRelevant Work:\n{selected_asset['name']}: {selected_asset['url']}"
-                logging.info(f"Including portfolio item: {selected_asset['name']}")
-            else:
-                logging.warning(f"Recommended portfolio item not found: {analysis['portfolio_item']}")
-
-        # Step 2: Email Generation using gpt-4o
+        # One gpt-4o call returns the strategy analysis and the email together
         email_prompt = f"""
-        Write a personalized cold email using this analysis:
-        {json.dumps(analysis, indent=2)}
-
         RECIPIENT:
         Name: {lead_info['name']}
         Role: {lead_info['role']}
         Company: {lead_info['company']}
+        Description: {company_description or 'Not available'}
         Headline: {lead_info['headline']}
-        {f'PORTFOLIO TO INCLUDE:{chr(10)}{portfolio_content}' if portfolio_content else ''}
-
-        FORMAT REQUIREMENTS:
-        - Start with "Hi {lead_info['name']},"
-        - Use single line breaks between paragraphs
-        - Keep paragraphs short (2-3 sentences)
-        - Based on the analysis, if required and only if required, use calendar link CTA: {agency_info.get('calendar_link')}
-        - 150-200 words maximum
-        - No placeholders, No example sample companies like ABC XYZ etc. No subject lines, and No signatures
-
-        Writing style: conversational, casual, engaging, simple to read, simple linear active voice sentences, informational and insightful.
-
-        Use the following formulas to write effective cold emails:
 
-        1. AIDA: Start with an attention-grabbing subject line or opening sentence. Highlight the recipient's pain points to build interest. List the benefits and use social proof, scarcity, or exclusivity to create desire. End with a specific call to action.
-
-        2. BBB: Keep the email brief, blunt, and basic. Shorten the email, get straight to the point, and use simple language.
-
-        3. PAS: Identify a sore point (Problem). Emphasize the severity with examples or personal experience (Agitate). Present your solution (Solve).
-
-        4. QVC: Start with a question. Highlight what makes you unique (Value Proposition). End with a strong call to action.
-
-        5. PPP: Open with a genuine compliment (Praise). Show how your product/service helps (Picture). Encourage them to take action (Push).
-
-        6. SCH: Introduce your product or idea (Star). Provide strong facts and reasons (Chain). End with a powerful call to action (Hook).
-
-        7. SSS: Introduce the star of your story (Star). Describe the problem they face (Story). Explain how your product solves the problem (Solution).
+        AGENCY CONTEXT:
+        {agency_info}
 
-        8. RDM: Use facts (Fact-packed), be brief (Telegraphic), be specific (Specific), avoid too many adjectives (Few adjectives), and make them curious (Arouse curiosity).
+        AVAILABLE PORTFOLIO ITEMS:
+        {portfolio.get_prompt_json(include_url=True)}
 
-        Write only the email body following the analyzed formula.
+        OPENING LINE: Hi {lead_info['name']},
+        CALENDAR LINK: {agency_info.get('calendar_link')}
         """
         logging.info(f"Email prompt: {email_prompt}")
-        print(f"Email prompt: {email_prompt}")
 
-        email_content = make_openai_call(
+        # Static instructions go first so OpenAI's automatic prompt-prefix caching can reuse them
+        plan_response = make_openai_call(
             model="gpt-4o",
-            messages=[{"role": "user", "content": email_prompt}],
-            temperature=0.7
+            messages=[
+                {"role": "system", "content": COLD_EMAIL_INSTRUCTIONS},
+                {"role": "user", "content": email_prompt}
+            ],
+            temperature=0.7,
+            response_format={"type": "json_object"}
         )
 
+        try:
+            analysis = json.loads(plan_response)
+        except json.JSONDecodeError:
+            logging.error(f"Failed to parse cold email JSON: {plan_response}")
+            raise ValueError("Email generation failed - invalid JSON")
+
+        missing_keys = [key for key in COLD_EMAIL_PLAN_KEYS if key not in analysis]
+        if missing_keys:
+            raise ValueError(f"Email generation missing required keys: {missing_keys}")
+        email_content = analysis.pop('email_body') or ''
+        logging.info(f"Parsed analysis: {json.dumps(analysis, indent=2)}")
+
+        # Get selected portfolio item if recommended
+        portfolio_data, _ = select_portfolio_item(portfolio, analysis)
+
         # Validate and clean the generated content
         if "{{" in email_content or "}}" in email_content:
             raise ValueError("Generated content contains unresolved placeholders")
@@ -231,16 +384,15 @@ def generate_company_description(company_domain):
         for protocol in ['https://', 'http://']:
             try:
                 url = f"{protocol}{company_domain}"
-                response = requests.get(url, 
-                    timeout=10,
-                    headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'},
-                    allow_redirects=True
-                )
-                response.raise_for_status()
+                with scrape_session.get(url, timeout=10, allow_redirects=True, stream=True) as response:
+                    response.raise_for_status()
+                    # Cap the download; the summary only needs the first 1000 characters of text
+                    markup = response.raw.read(MAX_SCRAPE_BYTES, decode_content=True)
                 
                 # If we get here, the request succeeded
-                soup = BeautifulSoup(response.text, 'html.parser')
-                text_content = ' '.join([p.get_text() for p in soup.find_all(['p', 'h1', 'h2', 'h3'])])
+                # lxml is the C parser; raw bytes let it honour the page's declared encoding
+                soup = BeautifulSoup(markup, 'lxml', parse_only=SCRAPE_TEXT_STRAINER)
+                text_content = ' '.join(tag.get_text() for tag in soup.find_all(SCRAPE_TEXT_TAGS))
                 text_content = text_content[:1000]
                 
                 if text_content.strip():
@@ -252,13 +404,14 @@ def generate_company_description(company_domain):
                     Focus on their core business and value proposition.
                     """
                     
-                    response = openai.chat.completions.create(
-                        model="gpt-3.5-turbo",
+                    # Same scraped text, same summary: reuse it even though the temperature is high
+                    return make_openai_call(
+                        model="gpt-4o-mini",
                         messages=[{"role": "user", "content": prompt}],
                         temperature=0.7,
-                        max_tokens=150
+                        max_tokens=150,
+                        cache=True
                     )
-                    return response.choices[0].message.content.strip()
                     
             except requests.RequestException:
                 continue  # Try next protocol if this one failed
@@ -274,7 +427,7 @@ def generate_company_description(company_domain):
         Maximum 2-3 sentences.
         """
         
-        response = openai.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
@@ -287,19 +440,115 @@ def generate_company_description(company_domain):
         logging.error(f"Error generating summary for {company_domain}: {e}")
         return "Company description unavailable."
 
+# Static reply-writing guidelines shared by the single-call and two-step reply flows
+REPLY_GUIDELINES = """
+TONE & STYLE:
+- Professional and consultative
+- Warm but not overly casual
+- Focused on value and solutions
+- Confident but measured
+
+CRITICAL RULES:
+1. NEVER mention pricing strategy
+2. Make sure to preserve the pricing till only the most necessary point in conversation when you have to reveal it and there is no other choice.
+2. If discussing pricing:
+   - Focus on value first
+   - Use ranges if necessary
+   - Defer details to proposal/call
+3. Keep response under 150 words
+4. Be specific to their message
+5. If suggesting a call, ALWAYS include calendar link
+6. Try to progress via email first
+7. If sending proposal, set clear expectations
+
+STRUCTURE:
+1. Acknowledge their points
+2. Provide relevant information
+3. Add value through insights
+4. Clear next step or question
+
+Write only the email body. No subject line or signature needed.
+"""
+
+# Conversation analysis fields, returned alone (two-step) or under "analysis" (single call)
+REPLY_ANALYSIS_SCHEMA = """{
+    "approach": "",
+    "key_points": [],
+    "include_portfolio": false,
+    "portfolio_item": null,
+    "cta": ""
+}"""
+
+# Static analysis instructions; the conversation and portfolio follow in the user message
+REPLY_ANALYSIS_INSTRUCTIONS = """
+You are an expert B2B sales strategist. Analyze the conversation thread provided by the user.
+
+ANALYZE AND PROVIDE:
+1. Conversation Stage:
+   - Early (Discovery/Education)
+   - Mid (Solution Discussion)
+   - Late (Evaluation/Negotiation)
+
+2. Client Signals:
+   - Explicit needs mentioned
+   - Implicit pain points
+   - Level of interest
+   - Budget sensitivity
+   - Timeline indicators
+
+3. Response Strategy:
+   - Can this be handled via email? (Yes/No)
+   - Is a proposal needed? (Yes/No)
+   - Is a call necessary? (Yes/No)
+   - Next best action
+
+4. Content Requirements:
+   - Which services to highlight
+   - Relevant portfolio examples
+   - Pricing discussion approach
+   - Value propositions to emphasize
+
+Provide a structured analysis focusing on these elements.
+"""
+
+# Single-call system prompt: analyze, then write the reply, returned together as JSON
+REPLY_INSTRUCTIONS = (
+    REPLY_ANALYSIS_INSTRUCTIONS
+    + """
+Then, as an experienced B2B solutions consultant, write the response email based on your analysis
+and the available resources provided by the user, following these guidelines:
+"""
+    + REPLY_GUIDELINES
+    + """
+Respond only and only in JSON FORMAT with the analysis and the email body:
+{
+    "analysis": """ + REPLY_ANALYSIS_SCHEMA + """,
+    "reply": ""
+}
+"""
+)
+
+# Two-step flow prompts: the analysis call, then the writing call
+REPLY_TWO_STEP_ANALYSIS_INSTRUCTIONS = (
+    REPLY_ANALYSIS_INSTRUCTIONS
+    + "\nRespond only and only in JSON FORMAT. \nReturn as JSON:\n"
+    + REPLY_ANALYSIS_SCHEMA
+)
+REPLY_WRITER_INSTRUCTIONS = (
+    "\nYou are an experienced B2B solutions consultant. Write a response email for the conversation "
+    "context provided by the user, following these guidelines:\n"
+    + REPLY_GUIDELINES
+)
+
 def determine_and_generate_response(lead_info, previous_conversation, agency_info):
-    """Generate a response using two-step process with careful context analysis"""
+    """Generate a response with careful context analysis, in one JSON call unless TWO_STEP_REPLIES is set"""
     logging.info("Starting enhanced response generation process...")
     
     # Initialize portfolio
-    portfolio = PortfolioAssets()
-    assets = portfolio.get_all_assets()
-    
-
-    # Step 1: Analyze conversation and determine context
-    analysis_prompt = f"""
-    You are an expert B2B sales strategist. Analyze this conversation thread:
+    portfolio = get_portfolio_assets()
 
+    # Per-thread context; the static instructions go first so their prompt prefix is cached
+    conversation_context = f"""
     CONVERSATION HISTORY:
     {previous_conversation}
 
@@ -307,140 +556,88 @@ def determine_and_generate_response(lead_info, previous_conversation, agency_inf
     {lead_info.get('last_message', '')}
 
     Available Portfolio Items:
-        {json.dumps([{
-            'name': asset['name'],
-            'type': asset['type'],
-            'industry': asset['industry'],
-            'service': asset['service_type']
-        } for asset in assets], indent=2)}
-
-    ANALYZE AND PROVIDE:
-    1. Conversation Stage:
-       - Early (Discovery/Education)
-       - Mid (Solution Discussion)
-       - Late (Evaluation/Negotiation)
-    
-    2. Client Signals:
-       - Explicit needs mentioned
-       - Implicit pain points
-       - Level of interest
-       - Budget sensitivity
-       - Timeline indicators
-    
-    3. Response Strategy:
-       - Can this be handled via email? (Yes/No)
-       - Is a proposal needed? (Yes/No)
-       - Is a call necessary? (Yes/No)
-       - Next best action
-    
-    4. Content Requirements:
-       - Which services to highlight
-       - Relevant portfolio examples
-       - Pricing discussion approach
-       - Value propositions to emphasize
-
-    Provide a structured analysis focusing on these elements.
-
-    Respond only and only in JSON FORMAT. 
-    Return as JSON:
-    {
-        "approach": "",
-        "key_points": [],
-        "include_portfolio": false,
-        "portfolio_item": null,
-        "cta": ""
-    }
+        {portfolio.get_prompt_json()}
+    """
+
+    resources = f"""
+    AVAILABLE RESOURCES:
+    - Services: {', '.join(agency_info.get('services', []))}
+    - Portfolio: {[f"{p.get('url')}: {p.get('description')}" for p in agency_info.get('portfolio_projects', [])]}
+    - Calendar Link: {Config.CALENDAR_LINK}
     """
 
     try:
-        analysis = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": analysis_prompt}],
-            temperature=0.7
-        )
-        conversation_analysis = analysis.choices[0].message.content.strip()
-        # Extract JSON from the conversation analysis using regex
-        json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-        json_match = re.search(json_pattern, conversation_analysis)
-        if not json_match:
-            raise ValueError("No valid JSON found in conversation analysis")
-        conversation_analysis = json_match.group()
-        logging.info(f"Conversation analysis completed: {conversation_analysis[:200]}...")
-
-        # Get analysis with portfolio recommendation
-        analysis = json.loads(conversation_analysis)
+        if Config.TWO_STEP_REPLIES:
+            analysis, final_response = _generate_reply_in_two_steps(conversation_context, resources)
+        else:
+            # One gpt-4o call returns the analysis and the reply together
+            reply_json = make_openai_call(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": REPLY_INSTRUCTIONS},
+                    {"role": "user", "content": conversation_context + resources}
+                ],
+                temperature=0.7,
+                response_format={"type": "json_object"}
+            )
+            try:
+                reply = json.loads(reply_json)
+            except json.JSONDecodeError:
+                raise ValueError("No valid JSON found in response generation")
+            analysis = reply.get('analysis') or {}
+            final_response = (reply.get('reply') or '').strip()
+            logging.info(f"Conversation analysis completed: {json.dumps(analysis)[:200]}...")
+
+            if not final_response:
+                raise ValueError("Response generation returned an empty reply")
+            if any(marker in final_response for marker in PLACEHOLDER_MARKERS):
+                logging.error("Generated response contains placeholders")
+                raise ValueError("Response generation failed - contains unresolved placeholders")
 
         # Get portfolio data if recommended
-        portfolio_data = {"has_portfolio": False, "assets": []}
-        if analysis.get('include_portfolio'):
-            selected_asset = portfolio.get_asset_by_name(analysis['portfolio_item'])
-            if selected_asset:
-                portfolio_data = portfolio.format_for_email_template([selected_asset])
-                logging.info(f"Including portfolio item: {selected_asset['name']}")
-            else:
-                logging.warning(f"Recommended portfolio item not found: {analysis['portfolio_item']}")
-
-
-        # Step 2: Generate the actual response
-        response_prompt = f"""
-        You are an experienced B2B solutions consultant. Write a response email following these guidelines:
-
-        CONVERSATION CONTEXT:
-        {conversation_analysis}
-
-        TONE & STYLE:
-        - Professional and consultative
-        - Warm but not overly casual
-        - Focused on value and solutions
-        - Confident but measured
-
-        AVAILABLE RESOURCES:
-        - Services: {', '.join(agency_info.get('services', []))}
-        - Portfolio: {[f"{p.get('url')}: {p.get('description')}" for p in agency_info.get('portfolio_projects', [])]}
-        - Calendar Link: {Config.CALENDAR_LINK}
-
-        CRITICAL RULES:
-        1. NEVER mention pricing strategy
-        2. Make sure to preserve the pricing till only the most necessary point in conversation when you have to reveal it and there is no other choice.
-        2. If discussing pricing:
-           - Focus on value first
-           - Use ranges if necessary
-           - Defer details to proposal/call
-        3. Keep response under 150 words
-        4. Be specific to their message
-        5. If suggesting a call, ALWAYS include calendar link
-        6. Try to progress via email first
-        7. If sending proposal, set clear expectations
-
-        STRUCTURE:
-        1. Acknowledge their points
-        2. Provide relevant information
-        3. Add value through insights
-        4. Clear next step or question
-
-        Write only the email body. No subject line or signature needed.
-        """
-
-        response = openai.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": response_prompt}],
-            temperature=0.7  # Reduced from 0.8 for more consistent tone
-        )
-        
-        final_response = response.choices[0].message.content.strip()
+        portfolio_data, _ = select_portfolio_item(portfolio, analysis)
         logging.info(f"Generated response: {final_response[:200]}...")
         
-        # Validate no placeholders remain
-        if "{{" in final_response or "}}" in final_response:
-            logging.error("Generated response contains placeholders")
-            raise ValueError("Response generation failed - contains unresolved placeholders")
-        
         return final_response, portfolio_data
 
     except Exception as e:
         logging.error(f"Error in response generation: {str(e)}")
         raise
-        raise
+
+def _generate_reply_in_two_steps(conversation_context: str, resources: str) -> Tuple[Dict, str]:
+    """Original analysis-then-write reply flow, kept for debugging quality regressions"""
+    conversation_analysis = make_openai_call(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": REPLY_TWO_STEP_ANALYSIS_INSTRUCTIONS},
+            {"role": "user", "content": conversation_context}
+        ],
+        temperature=0.7,
+        response_format={"type": "json_object"}
+    )
+    logging.info(f"Conversation analysis completed: {conversation_analysis[:200]}...")
+    try:
+        analysis = json.loads(conversation_analysis)
+    except json.JSONDecodeError:
+        raise ValueError("No valid JSON found in conversation analysis")
+
+    # Step 2: Generate the actual response
+    response_prompt = f"""
+    CONVERSATION CONTEXT:
+    {conversation_analysis}
+    {resources}
+    """
+
+    # Streamed so a leaked placeholder aborts the generation instead of waiting it out
+    final_response = stream_openai_call(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": REPLY_WRITER_INSTRUCTIONS},
+            {"role": "user", "content": response_prompt}
+        ],
+        temperature=0.7  # Reduced from 0.8 for more consistent tone
+    )
+    return analysis, final_response
 
 def generate_standard_response(lead_info, previous_conversation):
     prompt = (
@@ -448,8 +645,8 @@ def generate_standard_response(lead_info, previous_conversation):
         "The response should be polite, engaging, and should focus on building rapport. Do not reference agency info or services."
     )
 
-    response = openai.chat.completions.create(
-        model="gpt-3.5-turbo",
+    response = get_openai_client().chat.completions.create(
+        model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}],
         max_tokens=150,
         temperature=0.7
@@ -461,18 +658,27 @@ def generate_standard_response(lead_info, previous_conversation):
 def clean_and_validate_content(content: str, lead: Dict, agency_info: Dict) -> str:
     """Clean and refine the generated email content."""
     logging.info("Starting content cleaning and refinement")
+
+    # Most emails are already clean; only pay for a model call when something looks off
+    suspicious = [match.group(0) for match in SUSPICIOUS_CONTENT_RE.finditer(content)]
+    if not suspicious:
+        logging.info("No placeholders found; skipping content refinement")
+        return content
     
     prompt = f"""
     Clean and refine the following email content:
 
     {content}
 
+    FLAGGED PARTS:
+    {', '.join(dict.fromkeys(suspicious))}
+
     SUPPORTING DATA:
     {lead}
     {agency_info}
 
     Instructions:
-    Thoroughly go through the provided email body. 
+    Thoroughly go through the provided email body, starting with the flagged parts. 
     Check if there is anything placeholder like ABC or XYZ or anything repeating by mistake
     Check if silly mistake in the email like spelling mistake or anything
     Replace all parts you have identified as mistakes and wordsmith those parts to remove any mistakes / placeholders
@@ -483,15 +689,13 @@ def clean_and_validate_content(content: str, lead: Dict, agency_info: Dict) -> s
     TAKE A DEEP BREATH AND THINK STEP BY STEP..
     """
 
-    response = openai.chat.completions.create(
-        model="gpt-3.5-turbo",
+    cleaned_content = make_openai_call(
+        model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.3
     )
-
-    cleaned_content = response.choices[0].message.content.strip()
     
-    logging.info("==========Content cleaning and refinement completed: {cleaned_content}")
+    logging.info(f"==========Content cleaning and refinement completed: {cleaned_content}")
     return cleaned_content
 
 def extract_requirements(conversation_history: str) -> str:
@@ -505,12 +709,11 @@ def extract_requirements(conversation_history: str) -> str:
         Take a deep breath and think step by step.
         """
         
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
+        return make_openai_call(
+            model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
         logging.error(f"Error extracting requirements: {e}")
         return "Requirements extraction failed"
@@ -522,13 +725,98 @@ def generate_proposal(lead_info: Dict[str, Any], conversation_history: str, agen
     return markdown_content, pdf_content
 
 def convert_markdown_to_pdf(markdown_content: str) -> bytes:
-    """Convert markdown to PDF using markdown2pdf"""
-    # Convert markdown to HTML
-    html_content = markdown.markdown(markdown_content)
-    
-    # Convert HTML to PDF
-    pdf_bytes = HTML(string=html_content).write_pdf()
-    return pdf_bytes
+    """Convert markdown to PDF in the shared render process pool"""
+    # WeasyPrint pulls in Cairo/Pango on import; only proposal replies (and the pool workers) pay for that
+    from pdf_generator import get_pdf_pool, render_markdown_pdf
+
+    # Layout is CPU-bound and holds the GIL, so keep it off the lead worker threads
+    return get_pdf_pool().submit(render_markdown_pdf, markdown_content).result()
+
+# Static proposal strategist instructions; the company context follows in the user message
+PROPOSAL_ANALYSIS_INSTRUCTIONS = """
+You are an expert business proposal strategist with extensive experience crafting winning proposals for technology and digital service companies. Your goal is to analyze the opportunity provided by the user and provide strategic insights that will inform a compelling, value-focused proposal.
+
+PROVIDE A DETAILED ANALYSIS COVERING:
+
+1. Project Scope Assessment
+- Core business challenges being addressed
+- Technical and operational requirements
+- Key success metrics and outcomes
+- Potential risks and mitigation strategies
+
+2. Value Opportunity Analysis  
+- Immediate business impact
+- Long-term strategic benefits
+- Competitive advantages gained
+- ROI potential and measurement approach
+
+3. Timeline & Resource Planning
+- Critical project phases and dependencies
+- Resource requirements and allocation
+- Key milestones and deliverables
+- Flexibility considerations
+
+4. Investment Structure Recommendations
+- Value-based pricing strategy
+- Payment milestone alignment
+- Risk-reward considerations
+- Optional enhancements
+
+FORMAT YOUR RESPONSE AS:
+- Clear section headers
+- Bulleted key points
+- Specific, actionable insights
+- Data-driven recommendations where possible
+
+Focus on demonstrating deep understanding of the client's needs while highlighting unique value propositions. Be specific, strategic and business outcome focused.
+"""
+
+# Static proposal writer instructions and JSON shape; the analysis and portfolio follow in the user message
+PROPOSAL_WRITER_INSTRUCTIONS = """
+You are a professional proposal writer. Create a detailed proposal based on the analysis and portfolio examples provided by the user.
+
+Generate a complete proposal with these EXACT keys in valid JSON format:
+{
+    "executive_summary": "2-3 paragraphs",
+    "project_scope": {
+        "overview": "High-level description",
+        "deliverables": ["item1", "item2"],
+        "technical_requirements": ["req1", "req2"]
+    },
+    "timeline": [
+        {
+            "phase": "Phase name",
+            "duration": "X weeks",
+            "deliverables": ["item1", "item2"]
+        }
+    ],
+    "investment": {
+        "total": "Total amount",
+        "breakdown": [
+            {
+                "item": "Component name",
+                "amount": "Cost",
+                "description": "Details"
+            }
+        ],
+        "payment_schedule": [
+            {
+                "milestone": "Description",
+                "percentage": "XX%",
+                "amount": "Amount"
+            }
+        ]
+    },
+    "next_steps": ["step1", "step2"]
+}
+
+REQUIREMENTS:
+1. Must be valid JSON
+2. Use exact keys shown above
+3. Include realistic values
+4. Be specific and detailed
+5. Focus on value delivery
+"""
 
 def generate_proposal_content(lead_info: Dict[str, Any], conversation_history: str, agency_info: Dict[str, Any]) -> Dict[str, Any]:
     """Generate structured proposal content for HTML template"""
@@ -538,115 +826,45 @@ def generate_proposal_content(lead_info: Dict[str, Any], conversation_history: s
         logging.info(f"Extracted requirements: {requirements}")
         
         # Get portfolio assets
-        portfolio = PortfolioAssets()
+        portfolio = get_portfolio_assets()
         relevant_assets = portfolio.get_relevant_assets(requirements)
         
+        # Per-lead context only; the static strategist and writer instructions are system prompts
         analysis_prompt = f"""
-        You are an expert business proposal strategist with extensive experience crafting winning proposals for technology and digital service companies. Your goal is to analyze this opportunity and provide strategic insights that will inform a compelling, value-focused proposal.
-
         COMPANY CONTEXT:
         Company Name: {lead_info.get('company_name')}
         Industry Requirements: {requirements}
         Prior Discussions: {conversation_history}
-
-        PROVIDE A DETAILED ANALYSIS COVERING:
-
-        1. Project Scope Assessment
-        - Core business challenges being addressed
-        - Technical and operational requirements
-        - Key success metrics and outcomes
-        - Potential risks and mitigation strategies
-
-        2. Value Opportunity Analysis  
-        - Immediate business impact
-        - Long-term strategic benefits
-        - Competitive advantages gained
-        - ROI potential and measurement approach
-
-        3. Timeline & Resource Planning
-        - Critical project phases and dependencies
-        - Resource requirements and allocation
-        - Key milestones and deliverables
-        - Flexibility considerations
-
-        4. Investment Structure Recommendations
-        - Value-based pricing strategy
-        - Payment milestone alignment
-        - Risk-reward considerations
-        - Optional enhancements
-
-        FORMAT YOUR RESPONSE AS:
-        - Clear section headers
-        - Bulleted key points
-        - Specific, actionable insights
-        - Data-driven recommendations where possible
-
-        Focus on demonstrating deep understanding of the client's needs while highlighting unique value propositions. Be specific, strategic and business outcome focused.
         """
 
         # Get strategic analysis first
         analysis = make_openai_call(
             model="gpt-4o",
-            messages=[{"role": "user", "content": analysis_prompt}],
+            messages=[
+                {"role": "system", "content": PROPOSAL_ANALYSIS_INSTRUCTIONS},
+                {"role": "user", "content": analysis_prompt}
+            ],
             temperature=0.3
         )
         
         # Now generate the actual proposal content
         proposal_prompt = f"""
-        You are a professional proposal writer. Create a detailed proposal based on this analysis:
+        ANALYSIS:
         {analysis}
 
         PORTFOLIO EXAMPLES:
         {[f"{p.get('url')}: {p.get('details')}" for p in relevant_assets]}
-
-        Generate a complete proposal with these EXACT keys in valid JSON format:
-        {{
-            "executive_summary": "2-3 paragraphs",
-            "project_scope": {{
-                "overview": "High-level description",
-                "deliverables": ["item1", "item2"],
-                "technical_requirements": ["req1", "req2"]
-            }},
-            "timeline": [
-                {{
-                    "phase": "Phase name",
-                    "duration": "X weeks",
-                    "deliverables": ["item1", "item2"]
-                }}
-            ],
-            "investment": {{
-                "total": "Total amount",
-                "breakdown": [
-                    {{
-                        "item": "Component name",
-                        "amount": "Cost",
-                        "description": "Details"
-                    }}
-                ],
-                "payment_schedule": [
-                    {{
-                        "milestone": "Description",
-                        "percentage": "XX%",
-                        "amount": "Amount"
-                    }}
-                ]
-            }},
-            "next_steps": ["step1", "step2"]
-        }}
-
-        REQUIREMENTS:
-        1. Must be valid JSON
-        2. Use exact keys shown above
-        3. Include realistic values
-        4. Be specific and detailed
-        5. Focus on value delivery
         """
 
         # Generate proposal with strict JSON output
         proposal_json = make_openai_call(
             model="gpt-4o",
-            messages=[{"role": "user", "content": proposal_prompt}],
-            temperature=0.4
+            messages=[
+                {"role": "system", "content": PROPOSAL_WRITER_INSTRUCTIONS},
+                {"role": "user", "content": proposal_prompt}
+            ],
+            temperature=0.4,
+            response_format={"type": "json_object"}
         )
 
         # Validate JSON structure
@@ -677,7 +895,7 @@ def analyze_conversation(conversation_history: str) -> Dict[str, Any]:
         """
         
         response = make_openai_call(
-            model="gpt-3.5-turbo",
+            model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3
         )
@@ -693,15 +911,19 @@ def generate_response_email(lead: Dict[str, Any], conversation_history: str, age
         analysis = analyze_conversation(conversation_history)
         
         # Get portfolio examples
-        portfolio = PortfolioAssets()
+        portfolio = get_portfolio_assets()
         relevant_assets = portfolio.get_relevant_assets(lead['company_domain'])
         
         # Format portfolio examples for the email
         portfolio_section = format_portfolio_examples(relevant_assets)
         
-        prompt=f"""Please craft a detailed response to the email conversation based on the following information + instructions. Follow accurately and be focused.
+        # Resolve lead fields once; an empty name falls back to a neutral greeting instead of crashing
+        recipient_name = lead.get(SheetColumns.NAME.value) or ''
+        first_name = recipient_name.split()[0] if recipient_name.strip() else 'there'
+
+        prompt = f"""
             RECIPIENT CONTEXT:
-            - Name: {lead.get(SheetColumns.NAME.value)}
+            - Name: {recipient_name}
 
             SENDER CONTEXT:
             - Name: {agency_info.get('sender_name')}
@@ -710,73 +932,33 @@ def generate_response_email(lead: Dict[str, Any], conversation_history: str, age
             - Services: {', '.join(agency_info.get('services', []))}
             - Calendar Link: {agency_info.get('calendar_link')}
 
-            WRITING STYLE:
-            - Conversational and casual
-            - Simple, active voice sentences
-            - Engaging and personal
-            - Informational but concise
-            - Natural flow without obvious formula
-
-            FORMATTING REQUIREMENTS:
-            - Use markdown for emphasis: **bold** for key points
-            - Bold important elements like: company names, numbers, key benefits, action items
-            - Format the calendar link call-to-action prominently
-            - Keep paragraphs short and focused
-            - Use subtle formatting - don't overdo bold text
-            
-            KEY ELEMENTS TO BOLD [DO NOT OVER-BOLD THINGS]:
-            - Company names when mentioned
-            - Key metrics or numbers
-            - Primary value propositions
-            - Action items or next steps
-            - Important dates or timeframes
-            
-            EMAIL STRUCTURE (STRICT):
-            1. Opening paragraph (2-3 sentences)
-            2. Value proposition paragraph (2-3 sentences)
-            3. Social proof or relevance paragraph (2-3 sentences)
-            4. Call to action paragraph (1-2 sentences)
-
-            FORMAT RULES:
-            - Start with "Hi {lead.get(SheetColumns.NAME.value).split()[0]},"
-            - Use exactly ONE line break between paragraphs
-            - Keep paragraphs short and focused
-            - End with clear calendar link call-to-action
-            - Total length: 150-200 words maximum
+            OPENING LINE: Hi {first_name},
 
             If and only if required basis the conversation flow, include one or more projects from our portfolio. 
             {portfolio_section}
-            
-            MUST AVOID:
-            - Subject line
-            - Signature block
-            - Generic phrases
-            - [Your Name] placeholders
-            - Multiple line breaks
-            - Bullet points or lists
-            DO NOT use any placeholders like [Name] or [Company] or anything other placeholder
 
             Conversation Analysis: 
             {analysis}
-
-            Take a deep breath and think step by step.
         """
 
-        # Generate personalized response
-        response = openai.chat.completions.create(
+        # Generate personalized response; the static instructions lead so their prefix is cached
+        response = get_openai_client().chat.completions.create(
             model="gpt-4o",
-            messages=[{
-                "role": "user", 
-                "content": prompt
-            }],
+            messages=[
+                {"role": "system", "content": RESPONSE_EMAIL_INSTRUCTIONS},
+                {"role": "user", "content": prompt}
+            ],
             temperature=0.7
         )
         
         email_content = response.choices[0].message.content.strip()
         
         # Ensure no placeholders remain
-        email_content = email_content.replace("[Your Name]", agency_info['sender_name'])
-        email_content = email_content.replace("{{", "").replace("}}", "")
+        sender_name = agency_info['sender_name']
+        email_content = RESPONSE_PLACEHOLDER_RE.sub(
+            lambda m: sender_name if m.group(0).startswith('[') else '',
+            email_content
+        )
         
         return email_content, f"Re: {lead['Cold Email Subject']}"
         
@@ -793,8 +975,45 @@ def format_portfolio_examples(relevant_assets: Dict[str, Any]) -> str:
             formatted.append(f"{asset_type.title()}: {examples}")
     return "\n".join(formatted) if formatted else "Portfolio examples available upon request."
 
+# Placeholder labels the models tend to leave behind, filled from the lead/agency data
+PLACEHOLDER_LABELS = (
+    'name', 'first name', 'recipient name', 'full name',
+    'company', 'company name', 'recipient company',
+    'your name', 'sender name',
+    'agency', 'agency name', 'your company'
+)
+_LABEL_ALTERNATION = '|'.join(map(re.escape, PLACEHOLDER_LABELS))
+KNOWN_PLACEHOLDER_RE = re.compile(
+    rf'\[\s*({_LABEL_ALTERNATION})\s*\]|\{{\{{\s*({_LABEL_ALTERNATION})\s*\}}\}}',
+    re.IGNORECASE
+)
+# Any other [Label] (but not a markdown [text](url) link) or {{label}} left in the content
+UNRESOLVED_PLACEHOLDER_RE = re.compile(r'\[[^\[\]\n]{1,40}\](?!\()|\{\{.*?\}\}')
+
+def _placeholder_values(lead: Dict, agency_info: Dict) -> Dict[str, str]:
+    """Map each known placeholder label to its real value"""
+    recipient = lead.get(SheetColumns.NAME.value) or ''
+    first_name = recipient.split()[0] if recipient else ''
+    company = lead.get(SheetColumns.COMPANY_NAME.value) or ''
+    sender = (agency_info.get('sender') or {}).get('name') or agency_info.get('sender_name') or ''
+    agency = agency_info.get('name') or ''
+    return {
+        'name': first_name, 'first name': first_name,
+        'recipient name': recipient, 'full name': recipient,
+        'company': company, 'company name': company, 'recipient company': company,
+        'your name': sender, 'sender name': sender,
+        'agency': agency, 'agency name': agency, 'your company': agency
+    }
+
+def _fill_placeholders(text: str, values: Dict[str, str]) -> str:
+    """Replace known placeholders in one pass; ones without a value are left for the fallback"""
+    def replace(match):
+        label = (match.group(1) or match.group(2)).lower()
+        return values.get(label) or match.group(0)
+    return KNOWN_PLACEHOLDER_RE.sub(replace, text)
+
 def validate_final_content(email_body: str, subject_line: str, lead: Dict, agency_info: Dict) -> Tuple[str, str]:
-    """Final validation using GPT-3.5-turbo to catch any remaining placeholders or dummy content"""
+    """Final rule-based cleanup of placeholders and paragraph breaks, with an LLM fallback"""
     try:
         if not email_body or not subject_line:
             raise ValueError("Email body or subject line is empty")
@@ -802,7 +1021,26 @@ def validate_final_content(email_body: str, subject_line: str, lead: Dict, agenc
         # Ensure email_body has proper paragraph structure
         if '\n\n' not in email_body:
             email_body = email_body.replace('\n', '\n\n')
-        
+
+        values = _placeholder_values(lead, agency_info)
+        cleaned_subject = _fill_placeholders(subject_line, values).strip()
+        cleaned_body = _fill_placeholders(email_body, values).strip()
+
+        # Only unknown or unfillable placeholders need a model to rewrite around them
+        if UNRESOLVED_PLACEHOLDER_RE.search(cleaned_subject) or UNRESOLVED_PLACEHOLDER_RE.search(cleaned_body):
+            logging.warning("Unresolved placeholders after rule-based cleanup; falling back to LLM validation")
+            return _validate_final_content_with_llm(cleaned_body, cleaned_subject, lead, agency_info)
+
+        logging.info("Final content validation completed successfully")
+        return cleaned_subject, cleaned_body
+
+    except Exception as e:
+        logging.error(f"Error in final content validation: {str(e)}")
+        raise
+
+def _validate_final_content_with_llm(email_body: str, subject_line: str, lead: Dict, agency_info: Dict) -> Tuple[str, str]:
+    """Fallback validation using gpt-4o-mini for placeholders the rules can't fill"""
+    try:
         validation_prompt = f"""
         Analyze this email content and subject line for any remaining placeholders, dummy data, or sample text.
         Ensure the email has proper paragraph breaks (double newlines between paragraphs).
@@ -824,7 +1062,7 @@ def validate_final_content(email_body: str, subject_line: str, lead: Dict, agenc
         """
 
         response = make_openai_call(
-            model="gpt-3.5-turbo",
+            model="gpt-4o-mini",
             messages=[{"role": "user", "content": validation_prompt}],
             temperature=0.3
         )
@@ -834,8 +1072,8 @@ def validate_final_content(email_body: str, subject_line: str, lead: Dict, agenc
         if not cleaned_content or 'SUBJECT:' not in cleaned_content or 'BODY:' not in cleaned_content:
             raise ValueError("Invalid validation response format")
             
-        subject_match = re.search(r'SUBJECT:\s*(.*?)\s*BODY:', cleaned_content, re.DOTALL)
-        body_match = re.search(r'BODY:\s*(.*)', cleaned_content, re.DOTALL)
+        subject_match = VALIDATED_SUBJECT_RE.search(cleaned_content)
+        body_match = VALIDATED_BODY_RE.search(cleaned_content)
         
         if not subject_match or not body_match:
             raise ValueError("Could not extract subject or body from validation response")
@@ -847,7 +1085,7 @@ def validate_final_content(email_body: str, subject_line: str, lead: Dict, agenc
         if '\n\n' not in cleaned_body:
             cleaned_body = cleaned_body.replace('\n', '\n\n')
         
-        logging.info("Final content validation completed successfully")
+        logging.info("Final content validation completed via LLM fallback")
         return cleaned_subject, cleaned_body
 
     except Exception as e:
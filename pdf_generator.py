@@ -1,14 +1,21 @@
 from weasyprint import HTML, CSS
 from jinja2 import Environment, FileSystemLoader
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import multiprocessing
+import threading
+import markdown
 import os
 
+# Proposal PDFs are rendered in separate processes so layout doesn't stall the lead threads
+PDF_RENDER_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+env = Environment(loader=FileSystemLoader('templates'), auto_reload=False)
+proposal_template = env.get_template('proposal_template.html')
+
 def generate_beautiful_pdf(content: dict, output_path: str = "proposal.pdf"):
     """Generate a beautifully styled PDF with Inter Tight font"""
     
-    # Create Jinja2 environment
-    env = Environment(loader=FileSystemLoader('templates'))
-    template = env.get_template('proposal_template.html')
-    
     # Custom CSS with Inter Tight font
     css = CSS(string='''
         @import url('https://fonts.googleapis.com/css2?family=Plus+Jakarta+Sans:wght@400;500;600;700&family=Inter:wght@400;500;600&display=swap');
@@ -57,7 +64,7 @@ def generate_beautiful_pdf(content: dict, output_path: str = "proposal.pdf"):
     ''')
     
     # Render HTML template
-    html_content = template.render(**content)
+    html_content = proposal_template.render(**content)
     
     # Generate PDF
     HTML(string=html_content).write_pdf(
@@ -66,4 +73,25 @@ def generate_beautiful_pdf(content: dict, output_path: str = "proposal.pdf"):
         presentational_hints=True
     )
     
-    return output_path 
\ No newline at end of file
+    return output_path 
+@lru_cache(maxsize=1)
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Create the PDF render pool once; spawned workers avoid forking the threaded Flask process"""
+    return ProcessPoolExecutor(
+        max_workers=PDF_RENDER_WORKERS,
+        mp_context=multiprocessing.get_context('spawn')
+    )
+
+# markdown.markdown() builds a fresh converter per call; keep one per thread (instances aren't thread-safe)
+_markdown_local = threading.local()
+
+def render_markdown(markdown_content: str) -> str:
+    """Convert markdown to HTML with a reused per-thread converter"""
+    converter = getattr(_markdown_local, 'converter', None)
+    if converter is None:
+        converter = _markdown_local.converter = markdown.Markdown()
+    return converter.reset().convert(markdown_content)
+
+def render_markdown_pdf(markdown_content: str) -> bytes:
+    """Render markdown to PDF bytes; runs inside a get_pdf_pool() worker"""
+    return HTML(string=render_markdown(markdown_content)).write_pdf()
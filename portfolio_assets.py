@@ -3,7 +3,16 @@ from pathlib import Path
 from typing import List, Dict
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from drive_integration import list_folder_files
 import logging
+import threading
+import time
+import json
+
+# How long loaded assets are served before the Drive folder is listed again
+ASSETS_REFRESH_SECONDS = 3600
+# How soon to retry after a failed Drive listing
+ASSETS_RETRY_SECONDS = 60
 
 class PortfolioAssets:
     def __init__(self, folder_id: str = "1Xd7pEbuz2qKwGZcSaS1awxs-RDO3XpDU"):
@@ -11,6 +20,11 @@ class PortfolioAssets:
         self.folder_id = folder_id
         self.service = self._get_drive_service()
         self._assets = []
+        self._assets_by_name = {}
+        self._relevant_cache = {}
+        self._prompt_json = {}
+        self._next_refresh_at = 0.0
+        self._lock = threading.Lock()
         self._initialize_assets()
         
         # Log portfolio initialization
@@ -27,7 +41,7 @@ class PortfolioAssets:
                 'service_account.json', 
                 scopes=SCOPES
             )
-            return build('drive', 'v3', credentials=credentials)
+            return build('drive', 'v3', credentials=credentials, cache_discovery=False)
         except Exception as e:
             logging.error(f"Failed to initialize Drive service: {e}")
             raise
@@ -35,12 +49,9 @@ class PortfolioAssets:
     def _initialize_assets(self) -> None:
         """Fetch all portfolio assets from Drive folder"""
         try:
-            results = self.service.files().list(
-                q=f"'{self.folder_id}' in parents",
-                fields="files(id, name, description, webViewLink, mimeType)"
-            ).execute()
+            files = list_folder_files(self.service, self.folder_id, "id,name,description,webViewLink,mimeType")
 
-            self._assets = [{
+            assets = [{
                 'id': file['id'],
                 'name': self._clean_filename(file['name']),
                 'description': file.get('description', ''),
@@ -48,12 +59,37 @@ class PortfolioAssets:
                 'type': self._get_asset_type(file['mimeType'], file['name']),
                 'industry': self._extract_industry_tag(file.get('description', '')),
                 'service_type': self._extract_service_tag(file.get('description', ''))
-            } for file in results.get('files', [])]
-
-            logging.info(f"Loaded {len(self._assets)} portfolio assets")
+            } for file in files]
         except Exception as e:
+            # Keep serving the previous assets and try Drive again soon
             logging.error(f"Failed to initialize assets: {e}")
-            self._assets = []
+            self._next_refresh_at = time.monotonic() + ASSETS_RETRY_SECONDS
+            return
+
+        # Lowercased name -> first asset with that name, for get_asset_by_name
+        assets_by_name = {}
+        for asset in assets:
+            assets_by_name.setdefault(asset['name'].lower(), asset)
+        self._assets = assets
+        self._assets_by_name = assets_by_name
+        self._relevant_cache = {}
+        self._prompt_json = {}
+        self._next_refresh_at = time.monotonic() + ASSETS_REFRESH_SECONDS
+        logging.info(f"Loaded {len(self._assets)} portfolio assets")
+
+    def refresh(self) -> None:
+        """Reload assets from Drive"""
+        with self._lock:
+            self._initialize_assets()
+
+    def _is_stale(self) -> bool:
+        return time.monotonic() >= self._next_refresh_at
+
+    def _refresh_if_stale(self) -> None:
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():  # Another thread may have refreshed already
+                    self._initialize_assets()
 
     def _clean_filename(self, filename: str) -> str:
         """Remove extension and clean up filename"""
@@ -94,13 +130,40 @@ class PortfolioAssets:
 
     def get_all_assets(self) -> List[Dict]:
         """Get all portfolio assets"""
+        self._refresh_if_stale()
         return self._assets
 
+    def get_prompt_json(self, include_url: bool = False) -> str:
+        """Asset summary serialized for LLM prompts, built once per asset load"""
+        self._refresh_if_stale()
+        prompt_json = self._prompt_json.get(include_url)
+        if prompt_json is None:
+            summaries = []
+            for asset in self._assets:
+                summary = {
+                    'name': asset['name'],
+                    'type': asset['type'],
+                    'industry': asset['industry'],
+                    'service': asset['service_type']
+                }
+                if include_url:
+                    summary['url'] = asset['url']
+                summaries.append(summary)
+            prompt_json = self._prompt_json[include_url] = json.dumps(summaries, indent=2)
+        return prompt_json
+
     def get_relevant_assets(self, industry: str = None, service: str = None, limit: int = 2) -> List[Dict]:
         """Get relevant assets based on industry and service type"""
+        self._refresh_if_stale()
         if not self._assets:
             return []
 
+        # Matching is case-insensitive, so differently-cased queries share an entry
+        cache_key = (industry and industry.lower(), service and service.lower(), limit)
+        cached = self._relevant_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         # Score and sort assets based on relevance
         scored_assets = []
         for asset in self._assets:
@@ -113,16 +176,16 @@ class PortfolioAssets:
                 scored_assets.append((score, asset))
 
         # Sort by score and return top N assets
-        return [
+        relevant = [
             asset for _, asset in sorted(scored_assets, key=lambda x: x[0], reverse=True)
         ][:limit]
+        self._relevant_cache[cache_key] = tuple(relevant)
+        return relevant
 
     def get_asset_by_name(self, name: str):
         """Get specific asset by name"""
-        return next(
-            (asset for asset in self._assets if asset['name'].lower() == name.lower()),
-            None
-        )
+        self._refresh_if_stale()
+        return self._assets_by_name.get(name.lower())
 
     def format_for_email_template(self, selected_assets: List[Dict]) -> Dict:
         """Format portfolio assets for email template"""
@@ -143,4 +206,16 @@ class PortfolioAssets:
         return {
             "has_portfolio": True,
             "assets": formatted_assets
-        }
\ No newline at end of file
+        }
+
+_shared_portfolio = None
+_shared_portfolio_lock = threading.Lock()
+
+def get_portfolio_assets() -> PortfolioAssets:
+    """Return the process-wide PortfolioAssets instance, creating it on first use"""
+    global _shared_portfolio
+    if _shared_portfolio is None:
+        with _shared_portfolio_lock:
+            if _shared_portfolio is None:
+                _shared_portfolio = PortfolioAssets()
+    return _shared_portfolio
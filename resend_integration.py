@@ -2,9 +2,12 @@ import logging
 from config import Config
 from typing import List, Dict, Optional
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import base64
 from portfolio_assets import PortfolioAssets
 from datetime import datetime
+import threading
 
 # Enhanced logging format
 logging.basicConfig(
@@ -13,12 +16,17 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
+# Shared session so sends reuse pooled keep-alive connections to the Resend API
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=max(Config.MAX_WORKERS, 10)))
+
 class EmailDeliveryError(Exception):
     """Custom exception for email delivery failures"""
     pass
 
 class EmailSender:
     _current_index = 0
+    _lock = threading.Lock()  # Leads are sent from multiple worker threads
     
     @classmethod
     def validate_sender_config(cls, config: Dict) -> bool:
@@ -32,18 +40,21 @@ class EmailSender:
         if not Config.SENDER_CONFIGS:
             raise ValueError("No sender configurations available")
             
-        config = Config.SENDER_CONFIGS[cls._current_index]
+        with cls._lock:
+            index = cls._current_index
+            # Increment for next time
+            cls._current_index = (cls._current_index + 1) % len(Config.SENDER_CONFIGS)
+        
+        config = Config.SENDER_CONFIGS[index]
         
         # Validate config
         if not cls.validate_sender_config(config):
-            logging.error(f"Invalid sender config at index {cls._current_index}")
+            logging.error(f"Invalid sender config at index {index}")
             raise ValueError(f"Invalid sender configuration: {json.dumps(config, default=str)}")
             
-        logging.info(f"Selected sender config index: {cls._current_index}")
+        logging.info(f"Selected sender config index: {index}")
         logging.info(f"Using email: {config['email']} | Display Name: {config['display_name']}")
         
-        # Increment for next time
-        cls._current_index = (cls._current_index + 1) % len(Config.SENDER_CONFIGS)
         return config
 
 def validate_email_content(to_email: str, subject: str, html_content: str) -> None:
@@ -57,6 +68,17 @@ def validate_email_content(to_email: str, subject: str, html_content: str) -> No
     if not html_content or len(html_content.strip()) < 10:
         raise ValueError(f"Invalid email content length: {len(html_content) if html_content else 0} chars")
 
+def encode_attachments(attachments: List[Dict]) -> List[Dict]:
+    """Base64-encode raw bytes attachment content for the Resend JSON API"""
+    encoded = []
+    for attachment in attachments or []:
+        content = attachment.get('content')
+        if isinstance(content, (bytes, bytearray)):
+            # Encode once straight to an ASCII str; base64 output is always ASCII
+            attachment = {**attachment, 'content': base64.b64encode(content).decode('ascii')}
+        encoded.append(attachment)
+    return encoded
+
 def send_round_robin_email(to_email: str, subject: str, html_content: str, attachments: List[Dict] = None) -> Dict:
     """Send email using round-robin sender configuration with enhanced validation and logging"""
     start_time = datetime.now()
@@ -82,7 +104,7 @@ def send_round_robin_email(to_email: str, subject: str, html_content: str, attac
             "to": to_email,
             "subject": clean_subject,
             "html": html_content,
-            "attachments": attachments or []
+            "attachments": encode_attachments(attachments)
         }
         
         # Detailed logging
@@ -94,7 +116,7 @@ def send_round_robin_email(to_email: str, subject: str, html_content: str, attac
         logging.info(f"[{request_id}] - Attachments: {len(attachments or [])} files")
         
         # Make API request with timeout
-        response = requests.post(
+        response = session.post(
             "https://api.resend.com/emails",
             headers={
                 "Authorization": f"Bearer {sender_config['api_key']}",
@@ -156,3 +178,113 @@ def send_round_robin_email(to_email: str, subject: str, html_content: str, attac
         
         logging.error(f"[{request_id}] Error in send_round_robin_email: {str(e)}", exc_info=True)
         return error_response
+
+RESEND_BATCH_URL = "https://api.resend.com/emails/batch"
+RESEND_BATCH_LIMIT = 100  # Maximum emails per batch request
+
+def send_round_robin_email_batch(emails: List[Dict]) -> List[Dict]:
+    """Send many emails through Resend's batch endpoint, spreading them across senders round-robin.
+
+    Each email is a dict with 'to', 'subject' and 'html' keys. Attachments are not supported by
+    the batch endpoint. Returns one status dict per email, in input order, shaped like the
+    response of send_round_robin_email.
+    """
+    start_time = datetime.now()
+    request_id = f"batch_{start_time.strftime('%Y%m%d_%H%M%S')}"
+    results: List[Optional[Dict]] = [None] * len(emails)
+
+    def failed(position: int, error: Exception, from_email: str = "unknown") -> Dict:
+        email = emails[position]
+        return {
+            "status": "failed",
+            "request_id": request_id,
+            "error": str(error),
+            "error_type": type(error).__name__,
+            "details": {
+                "from": from_email,
+                "to": email.get('to'),
+                "subject": email.get('subject'),
+                "failed_at": datetime.now().isoformat()
+            }
+        }
+
+    logging.info(f"[{request_id}] Starting batch send of {len(emails)} emails")
+
+    # Assign senders round-robin, then group so each request uses a single API key
+    sender_groups: Dict[str, tuple] = {}
+    for position, email in enumerate(emails):
+        try:
+            validate_email_content(email.get('to'), email.get('subject'), email.get('html'))
+            sender_config = EmailSender.get_next_sender_config()
+        except Exception as e:
+            logging.error(f"[{request_id}] Skipping email to {email.get('to')}: {str(e)}")
+            results[position] = failed(position, e)
+            continue
+        sender_groups.setdefault(sender_config['email'], (sender_config, []))[1].append(position)
+
+    for sender_config, positions in sender_groups.values():
+        from_email = f"{sender_config['display_name']} <{sender_config['email']}>"
+
+        for chunk_start in range(0, len(positions), RESEND_BATCH_LIMIT):
+            chunk = positions[chunk_start:chunk_start + RESEND_BATCH_LIMIT]
+            payload = [{
+                "from": from_email,
+                "to": emails[position]['to'],
+                "subject": emails[position]['subject'].strip().strip('"\'').strip(),
+                "html": emails[position]['html']
+            } for position in chunk]
+
+            try:
+                logging.info(f"[{request_id}] Sending {len(chunk)} emails from {from_email}")
+                response = session.post(
+                    RESEND_BATCH_URL,
+                    headers={
+                        "Authorization": f"Bearer {sender_config['api_key']}",
+                        "Content-Type": "application/json"
+                    },
+                    json=payload,
+                    timeout=30
+                )
+
+                try:
+                    response_data = response.json()
+                except json.JSONDecodeError:
+                    response_data = {"raw_response": response.text}
+
+                if not 200 <= response.status_code < 300:
+                    logging.warning(f"[{request_id}] Batch sending failed: Status {response.status_code} - {response.text}; "
+                                    f"sending {len(chunk)} emails individually")
+                    for position in chunk:
+                        email = emails[position]
+                        results[position] = send_round_robin_email(email['to'], email['subject'], email['html'])
+                    continue
+
+                # Any 2xx means the batch was accepted; record the IDs Resend returned, if any
+                sent = (response_data.get('data') if isinstance(response_data, dict) else None) or []
+                if len(sent) != len(chunk):
+                    logging.warning(f"[{request_id}] Expected {len(chunk)} email IDs in batch response, got {len(sent)}")
+
+                sent_at = datetime.now()
+                for index, (position, email_data) in enumerate(zip(chunk, payload)):
+                    item = sent[index] if index < len(sent) and isinstance(sent[index], dict) else {}
+                    results[position] = {
+                        "status": "success",
+                        "request_id": request_id,
+                        "email_id": item.get('id'),
+                        "details": {
+                            "from": from_email,
+                            "to": email_data['to'],
+                            "subject": email_data['subject'],
+                            "sent_at": sent_at.isoformat(),
+                            "duration_seconds": (sent_at - start_time).total_seconds()
+                        }
+                    }
+
+            except Exception as e:
+                logging.error(f"[{request_id}] Error in send_round_robin_email_batch: {str(e)}", exc_info=True)
+                for position in chunk:
+                    results[position] = failed(position, e, from_email)
+
+    sent_count = sum(1 for result in results if result and result['status'] == 'success')
+    logging.info(f"[{request_id}] Batch complete: {sent_count}/{len(emails)} emails sent")
+    return results
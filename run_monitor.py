@@ -1,8 +1,8 @@
-from email_monitor import monitor_emails
+from email_monitor import watch_emails
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
 if __name__ == "__main__":
     logging.info("Starting email monitor...")
-    monitor_emails() 
\ No newline at end of file
+    watch_emails() 
\ No newline at end of file
@@ -5,11 +5,13 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import time
-import openai
+from openai_client import get_openai_client
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from jinja2 import Environment, FileSystemLoader
-jinja_env = Environment(loader=FileSystemLoader('templates'))
+# Templates don't change at runtime, so skip the per-render mtime check
+jinja_env = Environment(loader=FileSystemLoader('templates'), auto_reload=False)
+email_template = jinja_env.get_template('email_template.html')
 import json  # Add this with other imports
 
 def format_html_email(email_content: str, agency_info: Dict) -> str:
@@ -18,8 +20,7 @@ def format_html_email(email_content: str, agency_info: Dict) -> str:
         # Split content into paragraphs and clean up
         paragraphs = [p.strip() for p in email_content.split('\n') if p.strip()]
         
-        template = jinja_env.get_template('email_template.html')
-        return template.render(
+        return email_template.render(
             paragraphs=paragraphs,
             portfolio=agency_info.get('portfolio', {"has_portfolio": False, "assets": []}),
             calendar_link=agency_info.get('calendar_link', '#'),
@@ -85,7 +86,7 @@ def generate_company_description(domain: str) -> str:
                 response = requests.get(url, headers=headers, timeout=10, verify=False)
                 response.raise_for_status()
                 
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = BeautifulSoup(response.content, 'lxml')
                 
                 # Remove script and style elements
                 for script in soup(['script', 'style']):
@@ -135,7 +136,7 @@ def generate_ai_company_description(domain: str) -> str:
         Maximum 2-3 sentences.
         """
         
-        response = openai.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="gpt-4",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,